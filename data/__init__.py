@@ -7,11 +7,26 @@ This package contains all the game logic, menus, and utilities for the Escape th
 __version__ = "1.0.0"
 __author__ = "Escape the Castle Development Team"
 
-# Import main game components for easy access
-from .game import Player, game_loop
+# Import main game components for easy access. The pygame-dependent
+# modules are imported on first use so that pygame-free modules such as
+# data.combat can be used by tools without pygame installed.
 from .enemies import Enemy, get_random_enemy
 from .constants import *
-from .utils import *
+
+_LAZY_EXPORTS = {
+    'Player': 'game', 'game_loop': 'game',
+    'load_font': 'utils', 'load_image': 'utils', 'wrap_text': 'utils',
+    'draw_health_bar': 'utils', 'get_script_dir': 'utils',
+}
+
+
+def __getattr__(name):
+    """Import game and utility exports when they are first accessed."""
+    if name in _LAZY_EXPORTS:
+        from importlib import import_module
+        module = import_module(f".{_LAZY_EXPORTS[name]}", __name__)
+        return getattr(module, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 __all__ = [
     'Player', 'game_loop', 'Enemy', 'get_random_enemy',
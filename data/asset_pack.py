@@ -0,0 +1,191 @@
+"""
+Baked asset pack for Escape the Castle.
+
+The pack is a single file holding raw, already-scaled pixel data for the
+game's images, so start-up can skip PNG decoding and smoothscaling:
+
+    ETCPACK1 | index length (uint32) | JSON index | pixel blobs
+
+Build one for the resolutions you deploy to with:
+
+    python -m data.asset_pack 1920x1080 1280x720
+
+At runtime the pack is memory-mapped and surfaces are created straight
+from its buffer. Entries whose source image changed since the build are
+ignored, and the asset manager falls back to the PNG.
+"""
+
+import json
+import mmap
+import os
+import struct
+import sys
+import pygame
+from .config import SCRIPT_DIR, ASSET_PACK_FILE, BACKGROUND_IMAGE
+from .utils import parse_size
+
+PACK_MAGIC = b"ETCPACK1"
+PACK_HEADER = struct.Struct("<8sI")
+BLOB_ALIGNMENT = 16
+
+
+def get_entry_key(path, size, convert_alpha):
+    """Get the index key for an asset manager key."""
+    relative_path = os.path.relpath(path, SCRIPT_DIR).replace(os.sep, "/")
+    size_text = f"{size[0]}x{size[1]}" if size else "native"
+    return f"{relative_path}|{size_text}|{'rgba' if convert_alpha else 'rgb'}"
+
+
+def get_source_stamp(path):
+    """Get the (mtime_ns, size) of a source file, or None if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+class AssetPack:
+    """Read-only view of a baked asset pack."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, "rb")
+        self.buffer = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_length = PACK_HEADER.unpack_from(self.buffer, 0)
+        if magic != PACK_MAGIC:
+            raise ValueError(f"{path} is not an asset pack")
+        index_start = PACK_HEADER.size
+        self.index = json.loads(bytes(self.buffer[index_start:index_start + index_length]))
+        self.data_start = index_start + index_length
+        self.hits = 0
+        self.stale = 0
+
+    @classmethod
+    def open_default(cls):
+        """
+        Open the pack at ASSET_PACK_FILE if one has been built.
+
+        Returns:
+            AssetPack or None: The pack, or None if it is missing or unreadable
+        """
+        if not os.path.isfile(ASSET_PACK_FILE):
+            return None
+        try:
+            return cls(ASSET_PACK_FILE)
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring asset pack {ASSET_PACK_FILE}: {e}")
+            return None
+
+    def _get_fresh_entry(self, path, size, convert_alpha):
+        """Get the index entry for an asset if it matches its source file."""
+        entry = self.index.get(get_entry_key(path, size, convert_alpha))
+        if entry is None:
+            return None
+        if entry["source"] != get_source_stamp(path):
+            self.stale += 1
+            return None
+        return entry
+
+    def contains(self, path, size=None, convert_alpha=False):
+        """Check whether the pack has an up-to-date copy of an asset."""
+        return self._get_fresh_entry(path, size, convert_alpha) is not None
+
+    def load(self, path, size=None, convert_alpha=False):
+        """
+        Create a surface from the pack without copying its pixels.
+
+        The returned surface is not converted to the display format and
+        shares memory with the pack.
+
+        Args:
+            path (str): Path of the source image
+            size (tuple): Optional (width, height) the image was baked at
+            convert_alpha (bool): Whether the image was baked with alpha
+
+        Returns:
+            pygame.Surface or None: The surface, or None if the pack has no fresh copy
+        """
+        entry = self._get_fresh_entry(path, size, convert_alpha)
+        if entry is None:
+            return None
+        start = self.data_start + entry["offset"]
+        pixels = memoryview(self.buffer)[start:start + entry["length"]]
+        self.hits += 1
+        return pygame.image.frombuffer(pixels, tuple(entry["pixel_size"]), entry["format"])
+
+
+def get_pack_manifest(resolutions):
+    """
+    Get every asset to bake for a set of display resolutions.
+
+    Args:
+        resolutions (list): (width, height) tuples
+
+    Returns:
+        list: (path, size, convert_alpha) tuples without duplicates
+    """
+    from .preloader import get_game_asset_manifest, BOSS_ASSET
+
+    manifest = [BOSS_ASSET]
+    for width, height in resolutions:
+        manifest.append((BACKGROUND_IMAGE, (width, height), False))
+        manifest.extend(get_game_asset_manifest(width, height))
+    return list(dict.fromkeys(manifest))
+
+
+def build_pack(resolutions, output_path=ASSET_PACK_FILE):
+    """
+    Decode, scale and write every game image into a pack file.
+
+    Args:
+        resolutions (list): (width, height) tuples to bake backgrounds for
+        output_path (str): Where to write the pack
+
+    Returns:
+        int: Number of images written
+    """
+    index = {}
+    blobs = []
+    offset = 0
+    for path, size, convert_alpha in get_pack_manifest(resolutions):
+        try:
+            image = pygame.image.load(path)
+        except (pygame.error, FileNotFoundError) as e:
+            print(f"Skipping {path}: {e}")
+            continue
+        pixel_format = "RGBA" if convert_alpha else "RGB"
+        if image.get_bitsize() < 24:
+            # smoothscale needs 24 or 32 bit pixels
+            expanded = pygame.Surface(image.get_size(), pygame.SRCALPHA, 32)
+            expanded.blit(image, (0, 0))
+            image = expanded
+        if size:
+            image = pygame.transform.smoothscale(image, size)
+        pixels = pygame.image.tobytes(image, pixel_format)
+        padding = -len(pixels) % BLOB_ALIGNMENT
+        index[get_entry_key(path, size, convert_alpha)] = {
+            "offset": offset,
+            "length": len(pixels),
+            "pixel_size": list(image.get_size()),
+            "format": pixel_format,
+            "source": get_source_stamp(path),
+        }
+        blobs.append(pixels + b"\0" * padding)
+        offset += len(pixels) + padding
+
+    index_bytes = json.dumps(index).encode("utf-8")
+    # Pad the index so the first blob starts aligned
+    index_bytes += b" " * (-(PACK_HEADER.size + len(index_bytes)) % BLOB_ALIGNMENT)
+    with open(output_path, "wb") as f:
+        f.write(PACK_HEADER.pack(PACK_MAGIC, len(index_bytes)))
+        f.write(index_bytes)
+        for blob in blobs:
+            f.write(blob)
+    return len(index)
+
+
+if __name__ == "__main__":
+    resolution_args = sys.argv[1:] or ["1920x1080"]
+    count = build_pack([parse_size(arg) for arg in resolution_args])
+    print(f"Wrote {count} images to {ASSET_PACK_FILE}")
@@ -0,0 +1,173 @@
+"""
+Shared asset manager for Escape the Castle.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from .asset_pack import AssetPack
+from .config import ASSET_CACHE_BYTES
+from .utils import load_font, load_image
+
+
+def get_surface_bytes(surface):
+    """Get the approximate number of bytes a surface holds."""
+    if surface is None:
+        return 0
+    return surface.get_width() * surface.get_height() * surface.get_bytesize()
+
+
+class AssetManager:
+    """
+    Process-wide cache of decoded images, fonts and data files.
+
+    Images are keyed by (path, size, convert_alpha) so each screen size gets
+    its own scaled copy. They are evicted least-recently-used first once the
+    cache holds more than max_bytes. Fonts and data files are small and kept
+    for the life of the process. Images are taken from the baked asset pack
+    when it has an up-to-date copy, and decoded from their files otherwise.
+    """
+
+    def __init__(self, max_bytes=ASSET_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.images = OrderedDict()
+        self.fonts = {}
+        self.data = {}
+        self.bytes_held = 0
+        self.load_times = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._pack = None
+        self._pack_opened = False
+
+    @property
+    def pack(self):
+        """The baked asset pack, opened on first use (None if there is none)."""
+        if not self._pack_opened:
+            self._pack = AssetPack.open_default()
+            self._pack_opened = True
+        return self._pack
+
+    def in_pack(self, path, size=None, convert_alpha=False):
+        """Check whether an image can be loaded from the baked asset pack."""
+        return self.pack is not None and self.pack.contains(path, size, convert_alpha)
+
+    def image(self, path, size=None, convert_alpha=False):
+        """
+        Get an image, loading and scaling it on first use.
+
+        Args:
+            path (str): Path to the image file
+            size (tuple): Optional (width, height) to scale to
+            convert_alpha (bool): Whether to use convert_alpha() for transparency
+
+        Returns:
+            pygame.Surface or None: The image, or None if it failed to load
+        """
+        key = (path, tuple(size) if size else None, convert_alpha)
+        if key in self.images:
+            self.hits += 1
+            self.images.move_to_end(key)
+            return self.images[key]
+
+        self.misses += 1
+        start = time.perf_counter()
+        surface = self.pack.load(path, key[1], convert_alpha) if self.pack else None
+        if surface is not None:
+            surface = surface.convert_alpha() if convert_alpha else surface.convert()
+        else:
+            surface = load_image(path, size, convert_alpha)
+        self.load_times[key] = time.perf_counter() - start
+        self.store_image(key, surface)
+        return surface
+
+    def store_image(self, key, surface):
+        """
+        Add a ready surface to the cache, evicting old images if needed.
+
+        Args:
+            key (tuple): (path, size, convert_alpha) cache key
+            surface (pygame.Surface or None): The surface to store
+        """
+        if key in self.images:
+            self.bytes_held -= get_surface_bytes(self.images.pop(key))
+        self.images[key] = surface
+        self.bytes_held += get_surface_bytes(surface)
+        while self.bytes_held > self.max_bytes and len(self.images) > 1:
+            _, evicted = self.images.popitem(last=False)
+            self.bytes_held -= get_surface_bytes(evicted)
+            self.evictions += 1
+
+    def has_image(self, path, size=None, convert_alpha=False):
+        """Check whether an image is already cached."""
+        return (path, tuple(size) if size else None, convert_alpha) in self.images
+
+    def font(self, path, size, fallback_font='Arial'):
+        """
+        Get a font, loading it on first use.
+
+        Args:
+            path (str): Path to the font file
+            size (int): Font size
+            fallback_font (str): Fallback font name
+
+        Returns:
+            pygame.font.Font: The font
+        """
+        key = (path, size, fallback_font)
+        font = self.fonts.get(key)
+        if font is None:
+            start = time.perf_counter()
+            font = load_font(path, size, fallback_font)
+            self.load_times[key] = time.perf_counter() - start
+            self.fonts[key] = font
+        return font
+
+    def json(self, path, default=None):
+        """
+        Get a parsed JSON file, reading it on first use.
+
+        Args:
+            path (str): Path to the JSON file
+            default: Value to return if the file cannot be read
+
+        Returns:
+            The parsed data, or default on error
+        """
+        if path in self.data:
+            return self.data[path]
+        start = time.perf_counter()
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            print(f"Error loading {path}: {e}")
+            return default
+        self.load_times[path] = time.perf_counter() - start
+        self.data[path] = data
+        return data
+
+    def clear(self):
+        """Drop every cached asset."""
+        self.images.clear()
+        self.fonts.clear()
+        self.data.clear()
+        self.bytes_held = 0
+
+    def get_stats(self):
+        """Get cache counters, memory use and total load time."""
+        return {
+            "images": len(self.images),
+            "fonts": len(self.fonts),
+            "bytes_held": self.bytes_held,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "load_seconds": sum(self.load_times.values()),
+        }
+
+
+# Shared asset manager for every screen
+assets = AssetManager()
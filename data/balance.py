@@ -0,0 +1,263 @@
+"""
+Monte Carlo balance simulator for Escape the Castle.
+
+Plays many complete runs at once as NumPy arrays, from the difficulty's
+starting level up to and including the Mad King, using the same rules as
+data.combat. Run it with:
+
+    python -m data.balance --runs 1000000 --seed 1
+
+The simulated player picks one of the offered paths at random and only
+uses normal attacks against regular enemies, trying to run away instead
+on each turn with chance run_attempt_chance (0 unless overridden, so by
+default it never runs). It casts every saved spell against the Mad King
+before attacking, and cannot run from him.
+
+NumPy is only needed for this tool; the game itself does not use it.
+"""
+
+import argparse
+import json
+import time
+import numpy as np
+from .config import LEVEL_VARIATIONS_FILE
+from .constants import *
+from .enemies import ENEMY_LIST
+from .combat import DEFAULT_HEALTH_SCALE, DEFAULT_BOSS_HEALTH, RUN_BLOCKED_CHANCE, get_run_chance
+from .levels import LevelVariations, ACTIONS, WALLS
+
+# Action codes are indexes into the level data's ACTIONS
+STAIRS_DOWN, STAIRS_UP, DOOR, HALL = (ACTIONS.index(name) for name in ("stairs_down", "stairs_up", "door", "hall"))
+DEFAULT_MAX_STEPS = 5000
+
+
+def get_default_params(difficulty):
+    """
+    Get the balance parameters the game uses for a difficulty.
+
+    Args:
+        difficulty (str): Difficulty name
+
+    Returns:
+        dict: Parameter name -> value
+    """
+    starting_level = next((level for name, level, _, _ in DIFFICULTIES if name == difficulty),
+                          DIFFICULTIES[0][1])
+    return {
+        "starting_level": starting_level,
+        "starting_health": STARTING_HEALTH,
+        "attack": DEFAULT_ATTACK,
+        "spells": DEFAULT_SPELLS,
+        "health_scale": ENEMY_HEALTH_SCALES.get(difficulty, DEFAULT_HEALTH_SCALE),
+        "boss_health": BOSS_HEALTH.get(difficulty, DEFAULT_BOSS_HEALTH),
+        "boss_attack": BOSS_ATTACK,
+        "heal_chance": HEAL_CHANCE,
+        "min_heal": MIN_HEAL,
+        "max_heal": MAX_HEAL,
+        "min_attack_damage": MIN_ATTACK_DAMAGE,
+        "spell_bonus_min": SPELL_BONUS_MIN,
+        "spell_bonus_max": SPELL_BONUS_MAX,
+        "attack_variance": ATTACK_VARIANCE,
+        "run_chance": get_run_chance(difficulty),
+        "run_blocked_chance": RUN_BLOCKED_CHANCE,
+        "run_attempt_chance": 0.0,
+    }
+
+
+def load_variation_actions(path=LEVEL_VARIATIONS_FILE):
+    """
+    Load the (left, center, right) actions of every level variation.
+
+    Returns:
+        numpy.ndarray: (variations, 3) array of action codes
+    """
+    variations = LevelVariations.load(path).variations
+    return np.array([[ACTIONS.index(v[wall]) for wall in WALLS] for v in variations], dtype=np.int8)
+
+
+def fight(rng, health, enemy_health, enemy_attack, params, spells=None, can_run=False):
+    """
+    Resolve a batch of battles in place, one per element.
+
+    On each turn a player who can run tries to with chance
+    run_attempt_chance instead of attacking. As in data.combat, the attempt
+    succeeds with chance run_chance, is otherwise blocked without harm with
+    chance run_blocked_chance, and is otherwise answered with an enemy strike.
+
+    Args:
+        rng (numpy.random.Generator): Random source
+        health (numpy.ndarray): Player health, updated in place
+        enemy_health (numpy.ndarray): Enemy health, consumed
+        enemy_attack (numpy.ndarray): Enemy attack per battle
+        params (dict): Balance parameters
+        spells (numpy.ndarray): Spells to cast before attacking, updated in place;
+            None to only use normal attacks
+        can_run (bool): Whether the player may try to run (False for the Mad King)
+
+    Returns:
+        numpy.ndarray: True where the player won, False where they died or ran away
+    """
+    variance = params["attack_variance"]
+    run_attempt_chance = params["run_attempt_chance"] if can_run else 0.0
+    fighting = np.ones(health.shape, dtype=bool)
+    fled = np.zeros(health.shape, dtype=bool)
+    while True:
+        turn = np.flatnonzero(fighting)
+        if turn.size == 0:
+            break
+        struck = np.empty(0, dtype=turn.dtype)
+        # Nothing is drawn for runs unless the player may try, so seeded results do not move
+        if run_attempt_chance > 0:
+            running = rng.random(turn.size) < run_attempt_chance
+            roll = rng.random(int(running.sum()))
+            runner = turn[running]
+            escaped = runner[roll < params["run_chance"]]
+            fled[escaped] = True
+            fighting[escaped] = False
+            struck = runner[roll >= params["run_chance"] + params["run_blocked_chance"]]
+            turn = turn[~running]
+
+        damage = rng.integers(params["min_attack_damage"], params["attack"] + 1, size=turn.size)
+        if spells is not None:
+            casting = spells[turn] > 0
+            spell_damage = rng.integers(params["attack"] + params["spell_bonus_min"],
+                                        params["attack"] + params["spell_bonus_max"] + 1,
+                                        size=turn.size)
+            damage = np.where(casting, spell_damage, damage)
+            spells[turn[casting]] -= 1
+        enemy_health[turn] -= damage
+        killed = enemy_health[turn] <= 0
+        fighting[turn[killed]] = False
+
+        struck = np.concatenate((struck, turn[~killed]))
+        attack = enemy_attack[struck]
+        health[struck] -= rng.integers(attack - variance, attack + variance + 1)
+        fighting[struck[health[struck] <= 0]] = False
+    return (health > 0) & ~fled
+
+
+def simulate(difficulty, runs, seed=None, params=None, max_steps=DEFAULT_MAX_STEPS,
+             actions=None):
+    """
+    Simulate complete runs for one difficulty.
+
+    Args:
+        difficulty (str): Difficulty name
+        runs (int): Number of runs to play
+        seed (int or numpy.random.SeedSequence): Seed for the random generator
+        params (dict): Overrides for get_default_params(difficulty)
+        max_steps (int): Runs still going after this many choices count as timed out
+        actions (numpy.ndarray): Level variation actions (loaded from randomlevel.json if None)
+
+    Returns:
+        dict: Win, death and timeout rates, run length statistics, and the mean
+        health and fraction of runs still in the dungeon after each choice
+    """
+    rng = np.random.default_rng(seed)
+    params = {**get_default_params(difficulty), **(params or {})}
+    if actions is None:
+        actions = load_variation_actions()
+    enemy_health = np.array([int(e["health"] * params["health_scale"]) for e in ENEMY_LIST])
+    enemy_attack = np.array([e["attack"] for e in ENEMY_LIST])
+
+    level = np.full(runs, params["starting_level"], dtype=np.int32)
+    health = np.full(runs, params["starting_health"], dtype=np.int32)
+    spells = np.full(runs, params["spells"], dtype=np.int32)
+    steps = np.zeros(runs, dtype=np.int32)
+    won = np.zeros(runs, dtype=bool)
+    finished = np.zeros(runs, dtype=bool)
+    active = np.arange(runs)
+    health_curve = []
+    active_curve = []
+
+    for _ in range(max_steps):
+        if active.size == 0:
+            break
+        health_curve.append(float(health[active].mean()))
+        active_curve.append(active.size / runs)
+
+        variation = rng.integers(0, len(actions), size=active.size)
+        action = actions[variation, rng.integers(0, 3, size=active.size)]
+        steps[active] += 1
+
+        level[active[action == STAIRS_UP]] -= 1
+        level[active[action == STAIRS_DOWN]] += 1
+
+        door = active[action == DOOR]
+        heals = rng.random(door.size) < params["heal_chance"]
+        health[door[heals]] += rng.integers(params["min_heal"], params["max_heal"] + 1,
+                                            size=int(heals.sum()))
+        spells[door[~heals]] += 1
+
+        hall = active[action == HALL]
+        if hall.size:
+            enemy = rng.integers(0, len(ENEMY_LIST), size=hall.size)
+            hall_health = health[hall]
+            fight(rng, hall_health, enemy_health[enemy].copy(), enemy_attack[enemy], params,
+                  can_run=True)
+            health[hall] = hall_health
+
+        dead = active[health[active] <= 0]
+        finished[dead] = True
+
+        boss = active[(health[active] > 0) & (level[active] <= 1)]
+        if boss.size:
+            boss_health = np.full(boss.size, params["boss_health"])
+            boss_attack = np.full(boss.size, params["boss_attack"])
+            boss_player_health = health[boss]
+            boss_spells = spells[boss]
+            won[boss] = fight(rng, boss_player_health, boss_health, boss_attack, params,
+                              spells=boss_spells)
+            health[boss] = boss_player_health
+            spells[boss] = boss_spells
+            finished[boss] = True
+
+        active = active[~finished[active]]
+
+    ended = finished
+    run_length = steps[ended]
+    return {
+        "difficulty": difficulty,
+        "runs": runs,
+        "win_rate": float(won.mean()),
+        "death_rate": float((ended & ~won).mean()),
+        "timeout_rate": float((~ended).mean()),
+        "mean_run_length": float(run_length.mean()) if run_length.size else 0.0,
+        "median_run_length": float(np.median(run_length)) if run_length.size else 0.0,
+        "p95_run_length": float(np.percentile(run_length, 95)) if run_length.size else 0.0,
+        "std_run_length": float(run_length.std()) if run_length.size else 0.0,
+        "health_curve": health_curve,
+        "active_curve": active_curve,
+    }
+
+
+def main():
+    """Simulate every difficulty and print a summary."""
+    parser = argparse.ArgumentParser(description="Simulate Escape the Castle runs.")
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--difficulty", choices=[name for name, _, _, _ in DIFFICULTIES])
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument("--json", help="Also write the full results (with curves) to this file")
+    args = parser.parse_args()
+
+    difficulties = [args.difficulty] if args.difficulty else [name for name, _, _, _ in DIFFICULTIES]
+    seeds = np.random.SeedSequence(args.seed).spawn(len(difficulties))
+    actions = load_variation_actions()
+    results = []
+    print(f"{'difficulty':<10} {'win':>7} {'death':>7} {'timeout':>7} {'mean len':>9} {'p95 len':>8} {'secs':>6}")
+    for difficulty, seed in zip(difficulties, seeds):
+        start = time.perf_counter()
+        result = simulate(difficulty, args.runs, seed, max_steps=args.max_steps, actions=actions)
+        elapsed = time.perf_counter() - start
+        results.append(result)
+        print(f"{difficulty:<10} {result['win_rate']:7.2%} {result['death_rate']:7.2%} "
+              f"{result['timeout_rate']:7.2%} {result['mean_run_length']:9.1f} "
+              f"{result['p95_run_length']:8.0f} {elapsed:6.2f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,397 @@
+"""
+Headless benchmarks for Escape the Castle.
+
+Runs the game, the boss fight, the title screen and the welcome screen
+on SDL's dummy video driver with scripted input, at several window
+sizes, and measures frames per second, Python memory allocated per
+frame (tracemalloc), enemy sprite Surface copies and peak RSS:
+
+    python -m data.benchmark --output bench.json
+    python -m data.benchmark --baseline bench.json
+
+Every scenario and size runs in its own process, so caches and peak RSS
+do not carry over between them. Frame rates come from an untraced run;
+allocations from a second run under tracemalloc, which only sees Python
+allocations, not SDL's pixel buffers. With --baseline the results are
+compared against an earlier --output file and the command exits nonzero
+if any scenario got slower or heavier than the tolerance allows. A
+Surface copy in a frame that did not show an enemy is always a
+regression: steady-state battle frames must not allocate.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import pygame
+from .config import UPDATE_RATE
+from .constants import TYPING_DELAY, STARTING_HEALTH
+from .enemy_sprite import SURFACE_COUNTER, SHOW_COUNTER
+from .profiler import profiler
+from .replay import ReplaySession, SessionLog
+from .utils import parse_size
+from . import screen_loop
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+SCENARIOS = ("game", "boss", "title", "welcome")
+DEFAULT_SIZES = ("800x600", "1280x720", "1920x1080")
+DEFAULT_FRAMES = 1800  # 30 seconds of game time; the welcome message alone takes 8
+DEFAULT_TOLERANCE = 0.10
+# Marks a --run-one child's result line; at-exit reports may print around it
+RESULT_PREFIX = "benchmark result: "
+ALLOC_NOISE_KIB = 4.0  # Allocation changes below this are not regressions
+BENCH_SEED = 1
+BENCH_NAME = "Bench"
+
+# Game: a key every GAME_KEY_TICKS updates, cycling through every command
+GAME_LEVEL = 10
+GAME_KEY_TICKS = 30
+GAME_KEYS = ("1", "a", "s", "r", "2", "a", "3", "a")
+# Boss: attack every BOSS_KEY_TICKS updates with enough health to outlast the run
+BOSS_HEALTH = 100000
+BOSS_KEY_TICKS = 120
+
+
+class FrameProbe:
+    """
+    Counts frames, the enemy sprite's Surface copies in each and, when
+    tracing, the Python memory allocated in each.
+
+    A copy is only expected in a frame that showed an enemy (the first
+    time each image is shown); copies in any other frame are counted as
+    steady-state copies.
+    """
+
+    def __init__(self, trace=False):
+        self.trace = trace
+        self.frames = 0
+        self.start_time = None
+        self.frame_start_memory = 0
+        self.allocated = 0
+        self.retained_start = 0
+        self.surfaces = 0
+        self.steady_surfaces = 0
+        self.last_counts = (0, 0)
+
+    def _count_surfaces(self):
+        """Charge the enemy sprite's copies since the previous frame boundary."""
+        counts = (profiler.counts.get(SURFACE_COUNTER, 0), profiler.counts.get(SHOW_COUNTER, 0))
+        copied = counts[0] - self.last_counts[0]
+        shown = counts[1] - self.last_counts[1]
+        self.last_counts = counts
+        return copied, shown
+
+    def frame(self):
+        """Mark a frame boundary. Timing starts at the first one, after setup."""
+        if self.start_time is None:
+            if self.trace:
+                tracemalloc.start()
+                self.retained_start = self.frame_start_memory = tracemalloc.get_traced_memory()[0]
+            self._count_surfaces()
+            self.start_time = time.perf_counter()
+            return
+        self.frames += 1
+        copied, shown = self._count_surfaces()
+        self.surfaces += copied
+        if not shown:
+            self.steady_surfaces += copied
+        if self.trace:
+            current, peak = tracemalloc.get_traced_memory()
+            self.allocated += peak - self.frame_start_memory
+            tracemalloc.reset_peak()
+            self.frame_start_memory = current
+
+    def stop(self):
+        """
+        Finish measuring.
+
+        Returns:
+            dict: frames, seconds, fps, enemy_surfaces and steady_enemy_surfaces;
+            alloc_kib_per_frame and retained_kib when tracing
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        result = {"frames": self.frames, "seconds": elapsed,
+                  "fps": self.frames / elapsed if elapsed else 0.0,
+                  "enemy_surfaces": self.surfaces, "steady_enemy_surfaces": self.steady_surfaces}
+        if self.trace and tracemalloc.is_tracing():
+            result["alloc_kib_per_frame"] = self.allocated / 1024 / max(1, self.frames)
+            result["retained_kib"] = (tracemalloc.get_traced_memory()[0] - self.retained_start) / 1024
+            tracemalloc.stop()
+        return result
+
+
+class ProbedReplaySession(ReplaySession):
+    """A replay session that marks a frame every time it is polled."""
+
+    def __init__(self, log, probe):
+        super().__init__(log)
+        self.probe = probe
+
+    def poll(self, tick):
+        self.probe.frame()
+        return super().poll(tick)
+
+
+class ScreenScript:
+    """Scripted input for a menu screen: redraw for a number of frames, then finish."""
+
+    def __init__(self, probe, frames, finish_events):
+        """
+        Args:
+            probe (FrameProbe): Frame counter
+            frames (int): Frames to redraw before finishing
+            finish_events (list): Events that make the screen return
+        """
+        self.probe = probe
+        self.frames = frames
+        self.finish_events = finish_events
+        self.count = 0
+
+    def __call__(self, screen_name):
+        self.probe.frame()
+        self.count += 1
+        if self.count > self.frames:
+            return self.finish_events
+        return [pygame.event.Event(pygame.VIDEOEXPOSE)]
+
+
+def make_key_record(tick, char):
+    """Get an input log record for a key press."""
+    return (tick, pygame.key.key_code(char), ord(char))
+
+
+def make_log(difficulty, level, health, records, frames):
+    """Get a scripted session log that ends after a number of updates."""
+    return SessionLog(BENCH_SEED, UPDATE_RATE, TYPING_DELAY, BENCH_NAME, difficulty,
+                      level, health, records, frames, None)
+
+
+def run_game_scenario(screen, width, height, frames, probe, boss=False):
+    """Play a scripted session: wandering the castle, or the boss fight from level 1."""
+    from .game import Player, game_loop
+    if boss:
+        records = [make_key_record(tick, "a") for tick in range(BOSS_KEY_TICKS, frames, BOSS_KEY_TICKS)]
+        log = make_log("Hard", 1, BOSS_HEALTH, records, frames)
+    else:
+        records = [make_key_record(tick, GAME_KEYS[i % len(GAME_KEYS)])
+                   for i, tick in enumerate(range(GAME_KEY_TICKS, frames, GAME_KEY_TICKS))]
+        log = make_log("Easy", GAME_LEVEL, STARTING_HEALTH, records, frames)
+    player = Player(log.name, log.difficulty, log.starting_level, log.starting_health)
+    font = pygame.font.SysFont('Arial', 24)
+    small_font = pygame.font.SysFont('Arial', 18)
+    game_loop(screen, width, height, player, font, small_font, session=ProbedReplaySession(log, probe))
+
+
+def run_title_scenario(screen, width, height, frames, probe):
+    """Redraw the title screen, then click Start Adventure."""
+    from . import mainmenu
+    click = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(width // 2, height // 2 + 50), button=1)
+    screen_loop.set_input_script(ScreenScript(probe, frames, [click]))
+    try:
+        mainmenu.show_title_screen(screen, width, height)
+    finally:
+        screen_loop.set_input_script(None)
+
+
+def run_welcome_scenario(screen, width, height, frames, probe):
+    """Type out the intro and redraw the welcome screen, then enter a name."""
+    from . import welcome
+    keys = [pygame.event.Event(pygame.KEYDOWN, key=pygame.key.key_code(char), unicode=char, mod=0, scancode=0)
+            for char in BENCH_NAME.lower()]
+    keys.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_RETURN, unicode="\r", mod=0, scancode=0))
+    screen_loop.set_input_script(ScreenScript(probe, frames, keys))
+    try:
+        welcome.show_welcome_screen(screen, width, height)
+    finally:
+        screen_loop.set_input_script(None)
+
+
+def get_peak_rss_mib():
+    """Get this process's peak resident set size in MiB, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def run_one(scenario, size, frames, trace):
+    """
+    Run one scenario at one size in this process.
+
+    Args:
+        scenario (str): One of SCENARIOS
+        size (tuple): Window size
+        frames (int): Frames to run
+        trace (bool): Whether to measure allocations
+
+    Returns:
+        dict: The measurements
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    width, height = size
+    screen = pygame.display.set_mode(size)
+    probe = FrameProbe(trace)
+    if scenario in ("game", "boss"):
+        run_game_scenario(screen, width, height, frames, probe, boss=scenario == "boss")
+    elif scenario == "title":
+        run_title_scenario(screen, width, height, frames, probe)
+    else:
+        run_welcome_scenario(screen, width, height, frames, probe)
+    result = probe.stop()
+    result["peak_rss_mib"] = get_peak_rss_mib()
+    return result
+
+
+def run_in_subprocess(scenario, size, frames, trace):
+    """Run one scenario in a fresh interpreter and get its measurements."""
+    command = [sys.executable, "-m", "data.benchmark", "--run-one", scenario,
+               "--size", f"{size[0]}x{size[1]}", "--frames", str(frames)]
+    if trace:
+        command.append("--trace")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    completed = subprocess.run(command, cwd=root, capture_output=True, text=True)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scenario} at {size[0]}x{size[1]} failed:\n{completed.stderr}")
+    for line in completed.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    raise RuntimeError(f"{scenario} at {size[0]}x{size[1]} printed no result:\n{completed.stdout}")
+
+
+def run_benchmarks(scenarios, sizes, frames, trace=True):
+    """
+    Run every scenario at every size.
+
+    Returns:
+        dict: Machine information and one result per scenario and size
+    """
+    results = []
+    for scenario in scenarios:
+        for size in sizes:
+            result = run_in_subprocess(scenario, size, frames, trace=False)
+            if trace:
+                traced = run_in_subprocess(scenario, size, frames, trace=True)
+                result["alloc_kib_per_frame"] = traced["alloc_kib_per_frame"]
+                result["retained_kib"] = traced["retained_kib"]
+            result.update(scenario=scenario, width=size[0], height=size[1])
+            results.append(result)
+            print(format_result(result))
+    return {
+        "machine": {"python": platform.python_version(), "pygame": pygame.version.ver,
+                    "platform": platform.platform(), "processor": platform.processor()},
+        "frames": frames,
+        "results": results,
+    }
+
+
+def format_result(result):
+    """Format one result as a line of text."""
+    line = (f"{result['scenario']:<8} {result['width']:>5}x{result['height']:<5} "
+            f"{result['fps']:8.1f} fps")
+    if "alloc_kib_per_frame" in result:
+        line += f" {result['alloc_kib_per_frame']:8.1f} KiB/frame"
+    line += f" {result['enemy_surfaces']:3d} sprite copies ({result['steady_enemy_surfaces']} steady)"
+    if result.get("peak_rss_mib") is not None:
+        line += f" {result['peak_rss_mib']:7.1f} MiB peak RSS"
+    return line
+
+
+def find_steady_copies(report):
+    """
+    Find results whose enemy sprite copied a Surface in a frame that showed no enemy.
+
+    Args:
+        report (dict): Results from run_benchmarks()
+
+    Returns:
+        list: Descriptions of every such result
+    """
+    return [f"{r['scenario']} at {r['width']}x{r['height']}: {r['steady_enemy_surfaces']} "
+            f"enemy sprite copies in frames that showed no enemy"
+            for r in report["results"] if r["steady_enemy_surfaces"]]
+
+
+def compare(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Compare results with a baseline report.
+
+    A result regresses if its frame rate fell by more than the tolerance,
+    or its allocations per frame or peak RSS grew by more than it.
+
+    Args:
+        report (dict): Current results from run_benchmarks()
+        baseline (dict): Earlier results
+        tolerance (float): Allowed relative change
+
+    Returns:
+        list: Descriptions of every regression
+    """
+    previous = {(r["scenario"], r["width"], r["height"]): r for r in baseline["results"]}
+    regressions = []
+    for result in report["results"]:
+        key = (result["scenario"], result["width"], result["height"])
+        old = previous.get(key)
+        if old is None:
+            continue
+        name = f"{key[0]} at {key[1]}x{key[2]}"
+        if result["fps"] < old["fps"] * (1 - tolerance):
+            regressions.append(f"{name}: {old['fps']:.1f} -> {result['fps']:.1f} fps")
+        if "alloc_kib_per_frame" in result and "alloc_kib_per_frame" in old:
+            new_alloc, old_alloc = result["alloc_kib_per_frame"], old["alloc_kib_per_frame"]
+            if new_alloc > old_alloc * (1 + tolerance) and new_alloc - old_alloc > ALLOC_NOISE_KIB:
+                regressions.append(f"{name}: {old_alloc:.1f} -> {new_alloc:.1f} KiB/frame")
+        if result.get("peak_rss_mib") and old.get("peak_rss_mib"):
+            if result["peak_rss_mib"] > old["peak_rss_mib"] * (1 + tolerance):
+                regressions.append(f"{name}: {old['peak_rss_mib']:.1f} -> {result['peak_rss_mib']:.1f} MiB peak RSS")
+    return regressions
+
+
+def main():
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Benchmark Escape the Castle headlessly.")
+    parser.add_argument("--scenario", action="append", choices=SCENARIOS,
+                        help="Scenario to run (repeatable, default all)")
+    parser.add_argument("--size", action="append", type=parse_size,
+                        help=f"WIDTHxHEIGHT (repeatable, default {', '.join(DEFAULT_SIZES)})")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--no-trace", action="store_true", help="Skip the allocation runs")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare against an earlier --output file")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--run-one", choices=SCENARIOS, help=argparse.SUPPRESS)
+    parser.add_argument("--trace", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = args.size or [parse_size(size) for size in DEFAULT_SIZES]
+
+    if args.run_one:
+        print(RESULT_PREFIX + json.dumps(run_one(args.run_one, sizes[0], args.frames, args.trace)))
+        return
+
+    report = run_benchmarks(args.scenario or SCENARIOS, sizes, args.frames, trace=not args.no_trace)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    regressions = find_steady_copies(report)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            regressions += compare(report, json.load(f), args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if regressions:
+        sys.exit(1)
+    print("No regressions")
+
+
+if __name__ == "__main__":
+    main()
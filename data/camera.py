@@ -0,0 +1,167 @@
+"""
+Viewport for Escape the Castle's game screen.
+
+Screen shake moves the camera, not what it looks at. The scene is always
+composed unshaken; while a shake plays, it is composed off screen instead
+of on the display, and the finished frame is blitted to the display at
+the shake's offset when it is presented. Shaking then costs one blit per
+frame, and dirty-rect rendering keeps redrawing only what changed.
+
+The offset is picked in fixed updates from the session's camera stream,
+which nothing else draws from, so a replay shakes the same way at any
+frame rate.
+"""
+
+import pygame
+from .config import SHAKE_INTENSITY, SHAKE_DECAY
+from .constants import *
+
+# How much of the shake's intensity is left, given the fraction of it played
+DECAY_CURVES = {
+    "none": lambda t: 1.0,
+    "linear": lambda t: 1.0 - t,
+    "quadratic": lambda t: (1.0 - t) ** 2,
+}
+
+
+def get_decay_curve(name):
+    """
+    Get a decay curve by name.
+
+    Args:
+        name (str): One of DECAY_CURVES
+
+    Returns:
+        function: Maps the fraction of the shake played to the intensity left
+    """
+    curve = DECAY_CURVES.get(name)
+    if curve is None:
+        raise ValueError(f"Unknown shake decay {name!r}; expected one of {', '.join(DECAY_CURVES)}")
+    return curve
+
+
+class Camera:
+    """Presents composed frames to the display, offset by the current screen shake."""
+
+    def __init__(self, display, intensity=SHAKE_INTENSITY, decay=SHAKE_DECAY):
+        """
+        Args:
+            display (pygame.Surface): The display surface
+            intensity (int): Largest shake offset in pixels
+            decay (str): How the shake dies down, one of DECAY_CURVES
+
+        Raises:
+            ValueError: If decay is not one of DECAY_CURVES
+        """
+        self.display = display
+        self.intensity = intensity
+        self.decay = decay
+        self.frame = None
+        self.composing_off_screen = False
+        self.restored = False
+        self.start_time = 0
+        self.duration = 0
+        self.shake_intensity = 0
+        self.curve = get_decay_curve(decay)
+        self.offset = (0, 0)
+        self.shown_offset = (0, 0)
+
+    @property
+    def shaking(self):
+        """Whether a shake is playing."""
+        return self.duration > 0
+
+    def shake(self, duration, now, intensity=None, decay=None):
+        """
+        Start shaking, replacing any shake already playing.
+
+        Args:
+            duration (float): Length of the shake in milliseconds
+            now (float): Current simulation time
+            intensity (int or None): Largest offset; None uses the camera's
+            decay (str or None): One of DECAY_CURVES; None uses the camera's
+
+        Raises:
+            ValueError: If decay is not one of DECAY_CURVES
+        """
+        self.start_time = now
+        self.duration = duration
+        self.shake_intensity = self.intensity if intensity is None else intensity
+        self.curve = get_decay_curve(self.decay if decay is None else decay)
+
+    def update(self, now, random):
+        """
+        Pick this update's shake offset.
+
+        Args:
+            now (float): Current simulation time
+            random (random.Random): Stream to draw the offsets from
+        """
+        if not self.shaking:
+            return
+        played = (now - self.start_time) / self.duration
+        if played >= 1:
+            self.duration = 0
+            self.offset = (0, 0)
+            return
+        amplitude = round(self.shake_intensity * self.curve(played))
+        self.offset = (random.randint(-amplitude, amplitude), random.randint(-amplitude, amplitude))
+
+    def get_canvas(self):
+        """
+        Get the surface to compose this frame on.
+
+        The composition carries over between frames, so it is copied across
+        when a shake starts or ends.
+
+        Returns:
+            pygame.Surface: An off-screen frame while shaking, otherwise the display
+        """
+        if self.shaking:
+            if not self.composing_off_screen:
+                if self.frame is None or self.frame.get_size() != self.display.get_size():
+                    self.frame = pygame.Surface(self.display.get_size()).convert()
+                self.frame.blit(self.display, (0, 0))
+                self.composing_off_screen = True
+            return self.frame
+        if self.composing_off_screen:
+            # The display still shows the last shaken frame
+            self.display.blit(self.frame, (0, 0))
+            self.composing_off_screen = False
+            self.restored = True
+        return self.display
+
+    def present(self, dirty_renderer):
+        """
+        Show the composed frame at the current offset.
+
+        Args:
+            dirty_renderer (DirtyRectRenderer): Holds what changed this frame
+        """
+        display_rect = self.display.get_rect()
+        if self.composing_off_screen:
+            # Unless the frame or the offset changed, the display already shows it
+            if (dirty_renderer.needs_full_redraw() or dirty_renderer.dirty
+                    or self.offset != self.shown_offset):
+                self._blit_frame()
+                dirty_renderer.mark(display_rect)
+            self.shown_offset = self.offset
+        elif self.restored:
+            dirty_renderer.mark(display_rect)
+            self.restored = False
+            self.shown_offset = (0, 0)
+        dirty_renderer.present()
+
+    def _blit_frame(self):
+        """Blit the frame to the display at the offset, filling the edges it uncovers."""
+        x, y = self.offset
+        width, height = self.display.get_size()
+        self.display.blit(self.frame, (x, y))
+        if x > 0:
+            self.display.fill(BLACK, (0, 0, x, height))
+        elif x < 0:
+            self.display.fill(BLACK, (width + x, 0, -x, height))
+        if y > 0:
+            self.display.fill(BLACK, (0, 0, width, y))
+        elif y < 0:
+            self.display.fill(BLACK, (0, height + y, width, -y))
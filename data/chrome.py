@@ -0,0 +1,94 @@
+"""
+Static UI chrome for the game panel of Escape the Castle.
+
+The panel's black background, gold border, rounded input box and the
+player's name never change during a session, so they are composited
+into one surface when the resolution (or the name) changes and blitted
+in a single call each frame. Only the values that change are drawn on
+top of it.
+"""
+
+import pygame
+from .constants import *
+
+PANEL_PADDING = 10
+STATUS_HEIGHT = 30
+INPUT_BOX_HEIGHT = 50
+STATUS_SPACING = 20  # Gap between the items of the status line
+
+
+def get_panel_rect(width, height):
+    """
+    Get the game panel's area for a given display size.
+
+    Args:
+        width (int): Display width
+        height (int): Display height
+
+    Returns:
+        pygame.Rect: The panel, below the level area
+    """
+    top_area_height = height // 2
+    return pygame.Rect(HORIZONTAL_PADDING, top_area_height + BORDER_MARGIN,
+                       width - 2 * HORIZONTAL_PADDING,
+                       height - top_area_height - BORDER_MARGIN * 2)
+
+
+def get_log_rect(panel_rect):
+    """Get the log area inside a panel."""
+    return pygame.Rect(panel_rect.x + PANEL_PADDING, panel_rect.y + PANEL_PADDING + STATUS_HEIGHT + PANEL_PADDING,
+                       panel_rect.width - 2 * PANEL_PADDING,
+                       panel_rect.height - STATUS_HEIGHT - 2 * PANEL_PADDING - INPUT_BOX_HEIGHT)
+
+
+def get_input_rect(panel_rect):
+    """Get the input box inside a panel."""
+    return pygame.Rect(panel_rect.x + PANEL_PADDING, panel_rect.bottom - INPUT_BOX_HEIGHT - PANEL_PADDING,
+                       panel_rect.width - 2 * PANEL_PADDING, INPUT_BOX_HEIGHT)
+
+
+class PanelChrome:
+    """The composited static layer of the game panel."""
+
+    def __init__(self):
+        self.key = None
+        self.surface = None
+        self.status_x = 0
+        self.builds = 0
+
+    def get(self, width, height, font, player_name):
+        """
+        Get the panel's static layer, building it if anything it shows changed.
+
+        Args:
+            width (int): Display width
+            height (int): Display height
+            font (pygame.font.Font): Font of the status line
+            player_name (str): Name shown at the start of the status line
+
+        Returns:
+            pygame.Surface: The layer, the size of the panel
+        """
+        key = (width, height, font, player_name)
+        if key != self.key:
+            self.surface = self._build(get_panel_rect(width, height).size, font, player_name)
+            self.key = key
+            self.builds += 1
+        return self.surface
+
+    def _build(self, size, font, player_name):
+        """Composite the panel background, border, input box and name label."""
+        surface = pygame.Surface(size).convert()
+        rect = surface.get_rect()
+        surface.fill(BLACK)
+        pygame.draw.rect(surface, GOLD, rect, 2)
+
+        input_rect = get_input_rect(rect)
+        pygame.draw.rect(surface, DARK_GRAY, input_rect, border_radius=10)
+        pygame.draw.rect(surface, GOLD, input_rect, 2, border_radius=10)
+
+        name_text = font.render(f"Name: {player_name}", True, WHITE)
+        surface.blit(name_text, (PANEL_PADDING, PANEL_PADDING))
+        # Where the dynamic part of the status line starts, relative to the panel
+        self.status_x = PANEL_PADDING + name_text.get_width() + STATUS_SPACING
+        return surface
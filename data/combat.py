@@ -0,0 +1,166 @@
+"""
+Combat rules for Escape the Castle.
+
+This module does not import pygame, so the game loops and offline tools
+(balance simulations, solvers) share one copy of the rules. Every roll
+takes the random source as its first argument: the random module itself
+or a random.Random instance.
+"""
+
+from collections import namedtuple
+from .constants import *
+from .enemies import Enemy, ENEMY_LIST
+
+BOSS_NAME = "Mad King Baramour"
+DEFAULT_HEALTH_SCALE = 1.0
+DEFAULT_RUN_CHANCE = 0.4
+DEFAULT_BOSS_HEALTH = 150
+RUN_BLOCKED_CHANCE = 0.3  # Extra chance on top of the run chance of being blocked without harm
+
+# Outcomes of a run attempt
+RUN_SUCCESS = "success"
+RUN_BLOCKED = "blocked"
+RUN_STRUCK = "struck"
+
+# Outcomes of a battle
+BATTLE_WON = "won"
+BATTLE_LOST = "lost"
+BATTLE_FLED = "fled"
+
+BattleResult = namedtuple("BattleResult", ["outcome", "player_health", "spells", "turns"])
+
+
+def scale_enemy_health(health, difficulty):
+    """Scale an enemy's base health for a difficulty."""
+    return int(health * ENEMY_HEALTH_SCALES.get(difficulty, DEFAULT_HEALTH_SCALE))
+
+
+def get_run_chance(difficulty):
+    """Get the chance of escaping a battle for a difficulty."""
+    return RUN_CHANCES.get(difficulty, DEFAULT_RUN_CHANCE)
+
+
+def create_enemy(rng, difficulty):
+    """
+    Pick a random enemy with health scaled for the difficulty.
+
+    Args:
+        rng: Random source
+        difficulty (str): Difficulty name
+
+    Returns:
+        Enemy: The new enemy
+    """
+    data = rng.choice(ENEMY_LIST)
+    return Enemy(data["name"], scale_enemy_health(data["health"], difficulty), data["attack"])
+
+
+def create_boss(difficulty):
+    """Create the Mad King for a difficulty."""
+    return Enemy(BOSS_NAME, attack=BOSS_ATTACK,
+                 health=BOSS_HEALTH.get(difficulty, DEFAULT_BOSS_HEALTH))
+
+
+def roll_attack(rng, attack):
+    """Roll the damage of a normal player attack."""
+    return rng.randint(MIN_ATTACK_DAMAGE, attack)
+
+
+def roll_spell(rng, attack):
+    """Roll the damage of a player spell."""
+    return rng.randint(attack + SPELL_BONUS_MIN, attack + SPELL_BONUS_MAX)
+
+
+def roll_enemy_strike(rng, enemy_attack):
+    """Roll the damage of an enemy attack."""
+    return rng.randint(enemy_attack - ATTACK_VARIANCE, enemy_attack + ATTACK_VARIANCE)
+
+
+def attempt_run(rng, difficulty):
+    """
+    Roll a run attempt.
+
+    Returns:
+        str: RUN_SUCCESS, RUN_BLOCKED (no harm done) or RUN_STRUCK (enemy hits the player)
+    """
+    roll = rng.random()
+    success_chance = get_run_chance(difficulty)
+    if roll < success_chance:
+        return RUN_SUCCESS
+    if roll < success_chance + RUN_BLOCKED_CHANCE:
+        return RUN_BLOCKED
+    return RUN_STRUCK
+
+
+def open_chest(rng):
+    """
+    Roll the contents of a treasure chest.
+
+    Returns:
+        tuple: ("heal", amount) or ("spell", 1)
+    """
+    if rng.random() < HEAL_CHANCE:
+        return "heal", rng.randint(MIN_HEAL, MAX_HEAL)
+    return "spell", 1
+
+
+def attack_policy(player_health, spells, enemy_health):
+    """Battle policy that only uses normal attacks."""
+    return "attack"
+
+
+def spell_first_policy(player_health, spells, enemy_health):
+    """Battle policy that casts every spell before attacking."""
+    return "spell" if spells > 0 else "attack"
+
+
+def resolve_battle(rng, player_health, player_attack, spells, enemy_health, enemy_attack,
+                   difficulty="Medium", policy=attack_policy, can_run=True, max_turns=1000):
+    """
+    Play a battle to the end with the same rules as the game loop.
+
+    Each turn the policy picks "attack", "spell" or "run". A hit that does
+    not kill the enemy is answered with an enemy strike. A failed run is
+    either blocked without harm or punished with a strike.
+
+    Args:
+        rng: Random source
+        player_health (int): Player health at the start
+        player_attack (int): Player attack value
+        spells (int): Spells available
+        enemy_health (int): Enemy health (already scaled for difficulty)
+        enemy_attack (int): Enemy attack value
+        difficulty (str): Difficulty name, used for run chances
+        policy (callable): f(player_health, spells, enemy_health) -> action
+        can_run (bool): False for the boss fight
+        max_turns (int): Safety limit on the number of turns; reaching it counts as fleeing
+
+    Returns:
+        BattleResult: outcome, remaining player health and spells, turns taken
+    """
+    turns = 0
+    while turns < max_turns:
+        turns += 1
+        action = policy(player_health, spells, enemy_health)
+        if action == "run" and can_run:
+            result = attempt_run(rng, difficulty)
+            if result == RUN_SUCCESS:
+                return BattleResult(BATTLE_FLED, player_health, spells, turns)
+            if result == RUN_STRUCK:
+                player_health -= roll_enemy_strike(rng, enemy_attack)
+                if player_health <= 0:
+                    return BattleResult(BATTLE_LOST, 0, spells, turns)
+            continue
+
+        if action == "spell" and spells > 0:
+            spells -= 1
+            enemy_health -= roll_spell(rng, player_attack)
+        else:
+            enemy_health -= roll_attack(rng, player_attack)
+        if enemy_health <= 0:
+            return BattleResult(BATTLE_WON, player_health, spells, turns)
+
+        player_health -= roll_enemy_strike(rng, enemy_attack)
+        if player_health <= 0:
+            return BattleResult(BATTLE_LOST, 0, spells, turns)
+    return BattleResult(BATTLE_FLED, player_health, spells, turns)
@@ -31,6 +31,7 @@ BACKGROUND_MUSIC = os.path.join(AUDIO_DIR, "naughtyprincess", "naughty-princess.
 
 # Data Files
 LEVEL_VARIATIONS_FILE = os.path.join(SCRIPT_DIR, "randomlevel.json")
+ASSET_PACK_FILE = os.path.join(SCRIPT_DIR, "assets.pack")  # Built by python -m data.asset_pack
 
 # Screen Settings
 DEFAULT_FONT_SIZE = 24
@@ -48,3 +49,44 @@ MENU_PADDING = 40
 # Animation Settings
 DEFAULT_FPS = 60
 TYPING_SPEED = 0.5
+UPDATE_RATE = 60  # Fixed game updates per second; fades and shakes are tuned for this
+MAX_CATCH_UP_STEPS = 10  # Updates run in one frame at most; more time is dropped
+# Screen shake of enemy strikes: ETC_SHAKE_INTENSITY is its largest offset in pixels,
+# ETC_SHAKE_DECAY how it dies down over the strike (one of SHAKE_DECAYS)
+SHAKE_DECAYS = ("none", "linear", "quadratic")  # The names of camera.DECAY_CURVES
+DEFAULT_SHAKE_DECAY = "quadratic"
+SHAKE_INTENSITY = int(os.environ.get("ETC_SHAKE_INTENSITY", "10"))
+SHAKE_DECAY = os.environ.get("ETC_SHAKE_DECAY", DEFAULT_SHAKE_DECAY)
+if SHAKE_DECAY not in SHAKE_DECAYS:
+    print(f"Unknown shake decay {SHAKE_DECAY!r} (expected one of {', '.join(SHAKE_DECAYS)}); "
+          f"using {DEFAULT_SHAKE_DECAY}")
+    SHAKE_DECAY = DEFAULT_SHAKE_DECAY
+# Set ETC_FPS to cap the frame rate (0 renders as fast as possible, for benchmarking)
+FPS_CAP = int(os.environ.get("ETC_FPS", str(DEFAULT_FPS)))
+IDLE_WAIT_MS = 1000  # Longest a menu sleeps waiting for input before checking its timers
+PRELOAD_POLL_MS = 50  # How often menus check on background image loading
+
+# Rendering Settings
+# Set ETC_DIRTY_RECTS=1 to redraw and present only the screen regions that changed
+DIRTY_RECT_RENDERING = os.environ.get("ETC_DIRTY_RECTS", "0") == "1"
+# Set ETC_RENDER_SIZE (e.g. 1280x720) to draw at that logical resolution and scale
+# each frame to the display, instead of drawing at the display's native size
+RENDER_SIZE = os.environ.get("ETC_RENDER_SIZE") or None
+# Filter used to scale to the display: "nearest" (fastest), "linear" or "best"
+RENDER_QUALITY = os.environ.get("ETC_RENDER_QUALITY", "linear")
+
+# Asset Cache Settings
+# Upper bound on decoded image memory kept by the shared asset manager
+ASSET_CACHE_BYTES = int(os.environ.get("ETC_ASSET_CACHE_MB", "256")) * 1024 * 1024
+
+# Profiling Settings
+# Set ETC_PROFILE=1 to time each frame stage, show an overlay and write a report at exit
+PROFILE_ENABLED = os.environ.get("ETC_PROFILE", "0") == "1"
+PROFILE_OUTPUT = os.environ.get("ETC_PROFILE_OUTPUT", "profile.json")
+PROFILE_WINDOW = 600  # Frames kept for percentiles
+
+# Replay Settings
+# Set ETC_SEED to play a fixed session seed, and ETC_RECORD_DIR to write an
+# input log of every session there (replay it with python -m data.replay)
+SEED = int(os.environ["ETC_SEED"]) if os.environ.get("ETC_SEED") else None
+RECORD_DIR = os.environ.get("ETC_RECORD_DIR") or None
@@ -42,7 +42,6 @@ SHAKE_DURATION_PLAYER = 1500
 SHAKE_DURATION_ENEMY = 500
 SHAKE_DURATION_BOSS = 600
 SHAKE_DURATION_SPELL = 300
-SHAKE_OFFSET = 10
 ENEMY_SHAKE_OFFSET = 5
 
 # Typing Effect
@@ -55,6 +54,7 @@ ENEMY_IMAGE_SIZE = (500, 500)
 # Boss Settings
 BOSS_HEALTH = {"Easy": 100, "Medium": 150, "Hard": 200}
 BOSS_ATTACK = 40
+BOSS_PREFETCH_LEVEL = 3  # Start loading the boss sprite at this level
 
 # Treasure Settings
 HEAL_CHANCE = 0.7
@@ -0,0 +1,88 @@
+"""
+Dirty-rectangle presentation for Escape the Castle.
+"""
+
+import pygame
+
+
+class DirtyRectRenderer:
+    """
+    Tracks which screen regions changed and presents only those.
+
+    Callers describe each region with a signature (any comparable value
+    built from what the region shows). A region is redrawn only when its
+    signature differs from the previous frame. When disabled, every region
+    is reported as changed and present() falls back to a full flip.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.full_redraw = True
+        self.signatures = {}
+        self.rects = {}
+        self.dirty = []
+        self.frames = 0
+        self.full_frames = 0
+        self.idle_frames = 0
+        self.rects_updated = 0
+
+    def invalidate(self):
+        """Force a full redraw on the next frame (e.g. after a menu drew over the screen)."""
+        self.full_redraw = True
+
+    def needs_full_redraw(self):
+        """Check whether the whole screen has to be drawn this frame."""
+        return not self.enabled or self.full_redraw
+
+    def changed(self, region, signature):
+        """
+        Record a region's signature and report whether it changed.
+
+        Args:
+            region (str): Region name
+            signature: Comparable value describing the region's contents
+
+        Returns:
+            bool: True if the region must be redrawn
+        """
+        previous = self.signatures.get(region)
+        self.signatures[region] = signature
+        return self.needs_full_redraw() or previous != signature
+
+    def track_rect(self, region, rect):
+        """
+        Record where a region is drawn this frame.
+
+        Args:
+            region (str): Region name
+            rect (pygame.Rect): Area the region covers this frame
+
+        Returns:
+            pygame.Rect: Area covering both the previous and the current position
+        """
+        previous = self.rects.get(region, rect)
+        self.rects[region] = pygame.Rect(rect)
+        return rect.union(previous)
+
+    def mark(self, rect):
+        """Mark a screen rectangle as updated this frame."""
+        self.dirty.append(pygame.Rect(rect))
+
+    def present(self):
+        """Show the frame, updating only the dirty rectangles when possible."""
+        self.frames += 1
+        if self.needs_full_redraw():
+            pygame.display.flip()
+            self.full_frames += 1
+        elif self.dirty:
+            pygame.display.update(self.dirty)
+            self.rects_updated += len(self.dirty)
+        else:
+            self.idle_frames += 1
+        self.dirty = []
+        self.full_redraw = False
+
+    def get_stats(self):
+        """Get the presentation counters."""
+        return {"frames": self.frames, "full_frames": self.full_frames,
+                "idle_frames": self.idle_frames, "rects_updated": self.rects_updated}
@@ -0,0 +1,50 @@
+"""
+Display setup for Escape the Castle.
+
+By default the game draws at the display's native resolution, so layout,
+asset scaling and the per-frame fill rate all grow with the monitor. With
+ETC_RENDER_SIZE set, every screen draws at that fixed logical resolution
+instead, and pygame.SCALED has SDL scale each finished frame to the
+display in one pass (on the GPU where there is one). Mouse positions are
+mapped back to logical coordinates by SDL. ETC_RENDER_QUALITY picks the
+scaling filter, trading smoothness for speed.
+"""
+
+import os
+import pygame
+from .config import RENDER_SIZE, RENDER_QUALITY
+from .utils import parse_size
+
+# Values of SDL's SDL_RENDER_SCALE_QUALITY hint for each ETC_RENDER_QUALITY
+SCALE_QUALITY_HINTS = {"nearest": "0", "linear": "1", "best": "2"}
+
+
+def create_screen(render_size=RENDER_SIZE, quality=RENDER_QUALITY):
+    """
+    Open the game's fullscreen display.
+
+    Args:
+        render_size (str or None): Logical resolution as WIDTHxHEIGHT; None
+            draws at the display's native resolution
+        quality (str): Scaling filter, one of SCALE_QUALITY_HINTS
+
+    Returns:
+        pygame.Surface: The surface every screen draws to
+    """
+    if render_size:
+        try:
+            size = parse_size(render_size)
+        except ValueError:
+            print(f"Invalid render size {render_size!r} (expected WIDTHxHEIGHT); using the native resolution")
+        else:
+            hint = SCALE_QUALITY_HINTS.get(quality)
+            if hint is None:
+                print(f"Unknown render quality {quality!r}; using linear")
+                hint = SCALE_QUALITY_HINTS["linear"]
+            # Read by SDL when pygame creates the scaled renderer
+            os.environ["SDL_RENDER_SCALE_QUALITY"] = hint
+            try:
+                return pygame.display.set_mode(size, pygame.FULLSCREEN | pygame.SCALED)
+            except pygame.error as e:
+                print(f"Scaled display not available ({e}); using the native resolution")
+    return pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
@@ -0,0 +1,124 @@
+"""
+Enemy sprite with fade and shake effects for Escape the Castle.
+"""
+
+from .constants import *
+from .rng import rng
+from .profiler import profiler
+
+# Profiler counters: Surfaces copied, and enemies shown (the only time a copy is expected)
+SURFACE_COUNTER = "enemy_surfaces"
+SHOW_COUNTER = "enemy_shows"
+
+
+class EnemySprite:
+    """
+    Draws the current enemy with fade-in/fade-out and shake.
+
+    Each enemy image gets one persistent private copy the first time it is
+    shown. The fade is applied with set_alpha() on that copy, so battle
+    frames never allocate a Surface. Copies and shows are counted in the
+    profiler, so data.benchmark can check that no copy happens in a frame
+    that did not show an enemy. The fade advances in fixed updates and is
+    blended between the last two when drawn.
+    """
+
+    def __init__(self):
+        self.image = None
+        self.alpha = 0
+        self.previous_alpha = 0
+        self.fading_in = False
+        self.fading_out = False
+        self._surfaces = {}
+        self._applied_alpha = None
+
+    def _get_surface(self, image):
+        """Get the persistent surface for an image, copying it once."""
+        surface = self._surfaces.get(image)
+        if surface is None:
+            surface = image.copy()
+            self._surfaces[image] = surface
+            profiler.count(SURFACE_COUNTER)
+        return surface
+
+    def show(self, image):
+        """
+        Start fading in an enemy image.
+
+        Args:
+            image (pygame.Surface or None): The enemy image
+        """
+        profiler.count(SHOW_COUNTER)
+        self.image = self._get_surface(image) if image else None
+        self._applied_alpha = None
+        self.alpha = self.previous_alpha = 0
+        self.fading_in = True
+        self.fading_out = False
+
+    def fade_out(self):
+        """Start fading out the current enemy."""
+        self.fading_in = False
+        self.fading_out = True
+
+    def clear(self):
+        """Remove the current enemy immediately."""
+        self.image = None
+        self.alpha = self.previous_alpha = 0
+        self.fading_in = False
+        self.fading_out = False
+
+    def update(self, fade_speed):
+        """
+        Advance the fade animation.
+
+        Args:
+            fade_speed (int): Alpha change per update
+        """
+        if not self.image:
+            return
+        self.previous_alpha = self.alpha
+        if self.fading_in:
+            self.alpha += fade_speed
+            if self.alpha >= 255:
+                self.alpha = 255
+                self.fading_in = False
+        elif self.fading_out:
+            self.alpha -= fade_speed
+            if self.alpha <= 0:
+                self.clear()
+
+    def get_draw_alpha(self, blend=1.0):
+        """
+        Get the alpha to draw with between the last two updates.
+
+        Args:
+            blend (float): 0 for the previous update's alpha, 1 for the latest
+
+        Returns:
+            int: The blended alpha
+        """
+        return round(self.previous_alpha + (self.alpha - self.previous_alpha) * blend)
+
+    def draw(self, screen, center, shake=False, blend=1.0):
+        """
+        Draw the enemy centered on a point.
+
+        Args:
+            screen (pygame.Surface): Surface to draw on
+            center (tuple): Center position of the sprite
+            shake (bool): Whether to jitter the sprite (enemy is being hit)
+            blend (float): Position between the last two updates (see get_draw_alpha)
+        """
+        if not self.image:
+            return
+
+        alpha = self.get_draw_alpha(blend)
+        if self._applied_alpha != alpha:
+            self.image.set_alpha(alpha)
+            self._applied_alpha = alpha
+
+        rect = self.image.get_rect(center=center)
+        if shake:
+            rect.move_ip(rng.shake.randint(-ENEMY_SHAKE_OFFSET, ENEMY_SHAKE_OFFSET),
+                         rng.shake.randint(-ENEMY_SHAKE_OFFSET, ENEMY_SHAKE_OFFSET))
+        screen.blit(self.image, rect)
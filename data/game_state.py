@@ -2,124 +2,134 @@
 Game state management for Escape the Castle.
 """
 
+from .constants import *
+from .enemy_sprite import EnemySprite
+from .typewriter import Typewriter
+
+# States of the game's state machine (see data.game)
+WELCOME = "welcome"
+CHOOSING = "choosing"
+TYPING = "typing"
+BATTLE = "battle"
+COMBAT_FINISHED = "combat_finished"
+BOSS = "boss"
+
 class GameState:
-    """Manages the current state of the game."""
-    
-    def __init__(self):
+    """
+    Manages the current state of the game.
+
+    Times are simulation times in milliseconds from the session's frame
+    scheduler, so the state only changes in fixed updates and in response
+    to key presses.
+    """
+
+    def __init__(self, typing_delay=TYPING_DELAY):
+        self.typing_delay = typing_delay
         self.reset()
-    
+
     def reset(self):
         """Reset the game state to initial values."""
+        # State machine
+        self.state = WELCOME
+        self.state_time = 0
+
         # Combat state
         self.is_player_attacking = False
         self.is_enemy_attacking = False
         self.shake_start_time = 0
         self.shake_duration = 0
-        
+
         # Enemy display state
-        self.current_enemy_image = None
-        self.enemy_alpha = 0
-        self.enemy_fading_in = False
-        self.enemy_fading_out = False
-        
+        self.enemy_sprite = EnemySprite()
+
         # Typing effect state
-        self.is_typing_welcome = True
-        self.is_typing_choices = False
-        self.typing_cursor = 0
-        self.last_type_time = 0
-        
+        self.typewriter = Typewriter(self.typing_delay)
+
         # Game flow state
-        self.in_battle = False
         self.current_enemy = None
         self.current_choices = []
         self.full_game_log = []
-    
-    def start_attack(self, duration):
+
+    def set_state(self, state, now):
+        """
+        Switch to another state.
+
+        Args:
+            state (str): One of the state names above
+            now (float): Current simulation time
+        """
+        self.state = state
+        self.state_time = now
+
+    @property
+    def in_battle(self):
+        """Whether an enemy is being fought."""
+        return self.state in (BATTLE, BOSS)
+
+    def start_attack(self, duration, now):
         """Start a player attack animation."""
         self.is_player_attacking = True
-        self.shake_start_time = self.get_current_time()
+        self.shake_start_time = now
         self.shake_duration = duration
-    
-    def start_enemy_attack(self, duration):
+
+    def start_enemy_attack(self, duration, now):
         """Start an enemy attack animation."""
         self.is_enemy_attacking = True
-        self.shake_start_time = self.get_current_time()
+        self.shake_start_time = now
         self.shake_duration = duration
-    
-    def is_attack_finished(self):
+
+    def is_attacking(self):
+        """Check if an attack animation is playing."""
+        return self.is_player_attacking or self.is_enemy_attacking
+
+    def is_attack_finished(self, now):
         """Check if the current attack animation is finished."""
-        if self.is_player_attacking or self.is_enemy_attacking:
-            elapsed = self.get_current_time() - self.shake_start_time
-            return elapsed >= self.shake_duration
+        if self.is_attacking():
+            return now - self.shake_start_time >= self.shake_duration
         return True
-    
+
     def finish_attack(self):
         """Finish the current attack animation."""
         self.is_player_attacking = False
         self.is_enemy_attacking = False
-    
-    def start_enemy_fade_in(self, image):
-        """Start fading in an enemy image."""
-        self.current_enemy_image = image
-        self.enemy_alpha = 0
-        self.enemy_fading_in = True
-        self.enemy_fading_out = False
-    
-    def start_enemy_fade_out(self):
-        """Start fading out the current enemy image."""
-        self.enemy_fading_in = False
-        self.enemy_fading_out = True
-    
-    def update_enemy_fade(self, fade_speed):
-        """Update enemy fade animation."""
-        if self.enemy_fading_in:
-            self.enemy_alpha += fade_speed
-            if self.enemy_alpha >= 255:
-                self.enemy_alpha = 255
-                self.enemy_fading_in = False
-        elif self.enemy_fading_out:
-            self.enemy_alpha -= fade_speed
-            if self.enemy_alpha <= 0:
-                self.enemy_alpha = 0
-                self.current_enemy_image = None
-                self.enemy_fading_out = False
-    
-    def start_typing_effect(self, is_welcome=False, is_choices=False):
-        """Start a typing effect."""
-        self.is_typing_welcome = is_welcome
-        self.is_typing_choices = is_choices
-        self.typing_cursor = 0
-        self.last_type_time = self.get_current_time()
-    
-    def update_typing_effect(self, typing_delay):
-        """Update typing effect animation."""
-        if self.is_typing_welcome or self.is_typing_choices:
-            if self.get_current_time() - self.last_type_time > typing_delay:
-                self.typing_cursor += 1
-                self.last_type_time = self.get_current_time()
-    
-    def finish_typing_effect(self):
-        """Finish the typing effect."""
-        self.is_typing_welcome = False
-        self.is_typing_choices = False
-    
-    def start_battle(self, enemy):
-        """Start a battle with an enemy."""
-        self.in_battle = True
+
+    def start_typing(self, lines, now):
+        """
+        Show a new log, typing it out.
+
+        Args:
+            lines (list): The log lines
+            now (float): Current simulation time
+        """
+        self.full_game_log = lines
+        self.typewriter.start(lines, now)
+
+    def get_display_log(self):
+        """Get the log lines to draw: the typed part while typing, otherwise the whole log."""
+        if self.typewriter.typing or self.state == WELCOME:
+            return self.typewriter.visible
+        return self.full_game_log
+
+    def get_typing_line(self):
+        """Get the index of the log line being typed, or None."""
+        return self.typewriter.partial_line if self.typewriter.typing else None
+
+    def start_battle(self, enemy, image):
+        """
+        Start a battle with an enemy.
+
+        Args:
+            enemy (Enemy): The enemy
+            image (pygame.Surface or None): The enemy's image
+        """
         self.current_enemy = enemy
-        self.start_enemy_fade_in(enemy.get_image())
-    
+        self.enemy_sprite.show(image)
+
     def end_battle(self):
         """End the current battle."""
-        self.in_battle = False
         self.current_enemy = None
-        self.start_enemy_fade_out()
-    
+        self.enemy_sprite.fade_out()
+
     def add_to_log(self, message):
         """Add a message to the game log."""
         self.full_game_log.append(message)
-    
-    def get_current_time(self):
-        """Get the current time in milliseconds."""
-        import pygame
-        return pygame.time.get_ticks()
@@ -3,7 +3,9 @@ import pygame
 import sys
 import os
 from .constants import *
-from .utils import load_font, load_image, get_script_dir
+from .utils import get_script_dir
+from .assets import assets
+from .screen_loop import ScreenLoop
 
 def show_game_over(screen, width, height):
     """Displays the game over screen with buttons."""
@@ -12,11 +14,11 @@ def show_game_over(screen, width, height):
     
     # --- Background ---
     bg_path = os.path.join(script_dir, "images", "game", "gameover.jpg")
-    background = load_image(bg_path, (width, height))
+    background = assets.image(bg_path, (width, height))
 
     # --- Custom Font ---
     font_path = os.path.join(script_dir, "fonts", "Blkchcry.TTF")
-    font = load_font(font_path, 40, "georgia")
+    font = assets.font(font_path, 40, "georgia")
 
     # --- Buttons ---
     buttons = [
@@ -37,33 +39,39 @@ def show_game_over(screen, width, height):
                            btn_width, btn_height)
         button_rects.append(rect)
 
-    clock = pygame.time.Clock()
+    # Redraw only on input or when the highlighted button changes
+    hovered = None
+    with ScreenLoop("game_over") as loop:
+        while True:
+            for event in loop.poll():
+                if event.type == pygame.QUIT:
+                    return "exit_game"
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    for rect, btn in zip(button_rects, buttons):
+                        if rect.collidepoint(event.pos):
+                            return btn["action"]
 
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return "exit_game"
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                for rect, btn in zip(button_rects, buttons):
-                    if rect.collidepoint(event.pos):
-                        return btn["action"]
+            mouse_pos = pygame.mouse.get_pos()
+            now_hovered = next((i for i, rect in enumerate(button_rects) if rect.collidepoint(mouse_pos)), None)
+            if now_hovered != hovered:
+                hovered = now_hovered
+                loop.invalidate()
+            if not loop.needs_redraw():
+                continue
 
-        # --- Draw background ---
-        if background:
-            screen.blit(background, (0, 0))
-        else:
-            screen.fill(DARK_GRAY)
+            # --- Draw background ---
+            if background:
+                screen.blit(background, (0, 0))
+            else:
+                screen.fill(DARK_GRAY)
 
-        # --- Draw buttons ---
-        mouse_pos = pygame.mouse.get_pos()
-        for rect, btn in zip(button_rects, buttons):
-            color = GOLD if rect.collidepoint(mouse_pos) else WHITE
-            pygame.draw.rect(screen, DARK_GRAY, rect, border_radius=12)
-            pygame.draw.rect(screen, color, rect, 3, border_radius=12)
+            # --- Draw buttons ---
+            for i, (rect, btn) in enumerate(zip(button_rects, buttons)):
+                color = GOLD if i == hovered else WHITE
+                pygame.draw.rect(screen, DARK_GRAY, rect, border_radius=12)
+                pygame.draw.rect(screen, color, rect, 3, border_radius=12)
 
-            text_surface = font.render(btn["text"], True, color)
-            screen.blit(text_surface, text_surface.get_rect(center=rect.center))
-
-        pygame.display.flip()
-        clock.tick(60)
+                text_surface = font.render(btn["text"], True, color)
+                screen.blit(text_surface, text_surface.get_rect(center=rect.center))
 
+            loop.present()
@@ -0,0 +1,177 @@
+"""
+Retained-mode HUD widgets for Escape the Castle.
+
+Each widget is bound to attributes of an object (the Player) and keeps
+its rendered surface and rect between frames. It is re-rendered only
+when one of its values changes, so drawing an unchanged HUD is a few
+blits. The HUD counts the widgets re-rendered each frame, which shows
+that idle frames do no rendering at all.
+"""
+
+from abc import ABC, abstractmethod
+import pygame
+from .constants import *
+from .utils import draw_health_bar
+
+
+class Widget(ABC):
+    """
+    A HUD element showing attributes of an object.
+
+    Subclasses implement render() to draw the values onto a new surface;
+    one without it cannot be created.
+    Widgets are opaque and filled with the background they sit on.
+    """
+
+    def __init__(self, attributes, y_offset=0, background=BLACK):
+        """
+        Args:
+            attributes (tuple): Names of the attributes the widget shows
+            y_offset (int): Vertical offset from the HUD's row
+            background (tuple): Color of whatever the widget is drawn over
+        """
+        self.attributes = attributes
+        self.y_offset = y_offset
+        self.background = background
+        self.values = None
+        self.surface = None
+        self.rect = pygame.Rect(0, y_offset, 0, 0)
+
+    def update(self, source):
+        """
+        Re-render the widget if its values changed.
+
+        Args:
+            source: Object to read the bound attributes from
+
+        Returns:
+            bool: Whether the widget was re-rendered
+        """
+        values = tuple(getattr(source, name) for name in self.attributes)
+        if values == self.values:
+            return False
+        self.values = values
+        self.surface = self.render(*values)
+        self.rect.size = self.surface.get_size()
+        return True
+
+    @abstractmethod
+    def render(self, *values):
+        """
+        Draw the values onto a new surface.
+
+        Returns:
+            pygame.Surface: The rendered widget
+        """
+
+    def new_surface(self, size):
+        """Get a surface for the widget, filled with its background."""
+        surface = pygame.Surface(size).convert()
+        surface.fill(self.background)
+        return surface
+
+
+class TextWidget(Widget):
+    """A line of text built from a format template."""
+
+    def __init__(self, font, template, attributes, color=WHITE, **kwargs):
+        """
+        Args:
+            font (pygame.font.Font): Font to render with
+            template (str): str.format() template taking the values in order
+            attributes (tuple): Names of the attributes the widget shows
+            color (tuple): Text color
+        """
+        super().__init__(attributes, **kwargs)
+        self.font = font
+        self.template = template
+        self.color = color
+
+    def render(self, *values):
+        text = self.font.render(self.template.format(*values), True, self.color)
+        surface = self.new_surface(text.get_size())
+        surface.blit(text, (0, 0))
+        return surface
+
+
+class HealthBarWidget(Widget):
+    """A health bar followed by its "HP: current/max" text."""
+
+    def __init__(self, font, bar_width=150, bar_height=15, attributes=("health", "max_health"), **kwargs):
+        """
+        Args:
+            font (pygame.font.Font): Font for the text
+            bar_width (int): Width of the bar
+            bar_height (int): Height of the bar
+            attributes (tuple): Names of the current and maximum health attributes
+        """
+        super().__init__(attributes, **kwargs)
+        self.font = font
+        self.bar_width = bar_width
+        self.bar_height = bar_height
+
+    def render(self, health, max_health):
+        text_width, text_height = self.font.size(f"HP: {health}/{max_health}")
+        surface = self.new_surface((self.bar_width + 10 + text_width, max(self.bar_height, text_height)))
+        draw_health_bar(surface, 0, 0, self.bar_width, self.bar_height, health, max_health, self.font)
+        return surface
+
+
+class Hud:
+    """A row of widgets, laid out again only when one of them changes size."""
+
+    def __init__(self, widgets, spacing):
+        """
+        Args:
+            widgets (list): Widgets from left to right
+            spacing (int): Gap between widgets
+        """
+        self.widgets = widgets
+        self.spacing = spacing
+        self.rendered = 0
+        self.frames = 0
+        self.idle_frames = 0
+        self.renders = 0
+
+    def update(self, source):
+        """
+        Re-render the widgets whose values changed.
+
+        Args:
+            source: Object to read the bound attributes from
+
+        Returns:
+            int: Number of widgets re-rendered this frame
+        """
+        self.rendered = sum(widget.update(source) for widget in self.widgets)
+        self.frames += 1
+        self.renders += self.rendered
+        if self.rendered:
+            self.layout()
+        else:
+            self.idle_frames += 1
+        return self.rendered
+
+    def layout(self):
+        """Place the widgets left to right, relative to the row's origin."""
+        x = 0
+        for widget in self.widgets:
+            widget.rect.x = x
+            x += widget.rect.width + self.spacing
+
+    def draw(self, screen, x, y):
+        """
+        Draw every widget.
+
+        Args:
+            screen (pygame.Surface): Surface to draw on
+            x (int): Left of the row
+            y (int): Top of the row
+        """
+        for widget in self.widgets:
+            screen.blit(widget.surface, widget.rect.move(x, y))
+
+    def get_stats(self):
+        """Get the widget render counters."""
+        return {"frames": self.frames, "idle_frames": self.idle_frames, "renders": self.renders,
+                "last_frame": self.rendered}
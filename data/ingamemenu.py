@@ -1,6 +1,8 @@
 import pygame
 import sys
 import os
+from .assets import assets
+from .screen_loop import ScreenLoop
 
 # Define colors for the menu UI
 WHITE = (255, 255, 255)
@@ -38,13 +40,8 @@ def show_pause_menu(screen, width, height):
     # Load custom font
     script_dir = os.path.dirname(os.path.abspath(__file__))
     font_path = os.path.join(script_dir, 'fonts', 'Blkchcry.TTF')
-    try:
-        title_font = pygame.font.Font(font_path, 36)
-        button_font = pygame.font.Font(font_path, 24)
-    except FileNotFoundError:
-        print("Custom font not found. Using default Arial font.")
-        title_font = pygame.font.SysFont('Arial', 36)
-        button_font = pygame.font.SysFont('Arial', 24)
+    title_font = assets.font(font_path, 36)
+    button_font = assets.font(font_path, 24)
 
     # Title text
     title_text = title_font.render("Game Paused", True, GOLD)
@@ -81,19 +78,21 @@ def show_pause_menu(screen, width, height):
     screen.blit(main_menu_text, main_menu_text.get_rect(center=main_menu_button.center))
     screen.blit(exit_text, exit_text.get_rect(center=exit_game_button.center))
 
-    pygame.display.flip()
-
-    waiting = True
-    while waiting:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if return_button.collidepoint(event.pos):
-                    return "continue"
-                if main_menu_button.collidepoint(event.pos):
-                    return "exit_main_menu"
-                if exit_game_button.collidepoint(event.pos):
-                    return "exit_game"
+    # The menu is drawn once over the paused game and only shown again after input
+    with ScreenLoop("pause") as loop:
+        loop.present()
+        while True:
+            for event in loop.poll():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    if return_button.collidepoint(event.pos):
+                        return "continue"
+                    if main_menu_button.collidepoint(event.pos):
+                        return "exit_main_menu"
+                    if exit_game_button.collidepoint(event.pos):
+                        return "exit_game"
+            if loop.needs_redraw():
+                loop.present()
 
@@ -4,117 +4,149 @@ Input handling for Escape the Castle game.
 
 import pygame
 from .constants import *
+from .game_state import TYPING
+from .rng import rng
+from . import combat
 
 class InputHandler:
-    """Handles all game input events."""
-    
+    """
+    Handles all game input events.
+
+    Which keys do anything depends on the current state: each state of
+    the game names one of the key handlers below, or none.
+    """
+
     def __init__(self, game_state, player):
         self.game_state = game_state
         self.player = player
-        self.current_choices = []
-    
-    def handle_event(self, event, screen, width, height):
-        """Handle a pygame event and return the appropriate action."""
+        self.key_handlers = {
+            "choice": self._handle_choice_input,
+            "battle": self._handle_battle_input,
+            "boss": self._handle_boss_input,
+        }
+
+    def handle_event(self, event, screen, width, height, keys, now):
+        """
+        Handle a pygame event and return the appropriate action.
+
+        Args:
+            event (pygame.event.Event): The event
+            screen (pygame.Surface): Screen for the pause menu
+            width (int): Screen width
+            height (int): Screen height
+            keys (str or None): Key handler of the current state
+            now (float): Current simulation time
+
+        Returns:
+            str or tuple or None: "exit" on quit, the pause menu's result
+            after Escape, otherwise what the key did
+        """
         if event.type == pygame.QUIT:
             return "exit"
-        
+
         elif event.type == pygame.KEYDOWN:
             if event.key == pygame.K_ESCAPE:
                 return self._handle_escape_key(screen, width, height)
-            elif self.game_state.in_battle:
-                return self._handle_battle_input(event)
-            elif not self.game_state.is_typing_welcome and not self.game_state.is_typing_choices:
-                return self._handle_choice_input(event)
-        
+            handler = self.key_handlers.get(keys)
+            if handler:
+                return handler(event, now)
+
         return None
-    
+
     def _handle_escape_key(self, screen, width, height):
         """Handle the escape key (pause menu)."""
         import data.ingamemenu as ingamemenu
         pause_result = ingamemenu.show_pause_menu(screen, width, height)
         return pause_result
-    
-    def _handle_battle_input(self, event):
-        """Handle input during battle."""
+
+    def _handle_battle_input(self, event, now):
+        """Handle input during battle, once the encounter has been typed out."""
+        if self.game_state.typewriter.typing:
+            return None
         if event.key == pygame.K_a:
-            return self._handle_attack()
+            return self._handle_attack(now)
         elif event.key == pygame.K_s:
-            return self._handle_spell()
+            return self._handle_spell(now)
         elif event.key == pygame.K_r:
-            return self._handle_run()
+            return self._handle_run(now)
         return None
-    
-    def _handle_attack(self):
+
+    def _handle_attack(self, now):
         """Handle attack input."""
-        if not self.game_state.is_player_attacking and not self.game_state.is_enemy_attacking:
-            from .constants import MIN_ATTACK_DAMAGE, SHAKE_DURATION_PLAYER
-            import random
-            
-            dmg = random.randint(MIN_ATTACK_DAMAGE, self.player.attack)
+        if not self.game_state.is_attacking():
+            dmg = combat.roll_attack(rng.combat, self.player.attack)
             self.game_state.current_enemy.take_damage(dmg)
             self.game_state.add_to_log(f"You attack {self.game_state.current_enemy.name} for {dmg} damage!")
-            self.game_state.start_attack(SHAKE_DURATION_PLAYER)
+            self.game_state.start_attack(SHAKE_DURATION_PLAYER, now)
             return "attack"
         return None
-    
-    def _handle_spell(self):
+
+    def _handle_spell(self, now):
         """Handle spell input."""
-        if (self.player.spells > 0 and 
-            not self.game_state.is_player_attacking and 
-            not self.game_state.is_enemy_attacking):
-            
-            from .constants import SPELL_BONUS_MIN, SPELL_BONUS_MAX, SHAKE_DURATION_PLAYER
-            import random
-            
-            dmg = random.randint(self.player.attack + SPELL_BONUS_MIN, 
-                               self.player.attack + SPELL_BONUS_MAX)
+        if self.player.spells > 0 and not self.game_state.is_attacking():
+            dmg = combat.roll_spell(rng.combat, self.player.attack)
             self.game_state.current_enemy.take_damage(dmg)
             self.player.spells -= 1
             self.game_state.add_to_log(f"You unleash a spell on {self.game_state.current_enemy.name} for {dmg} damage!")
-            self.game_state.start_attack(SHAKE_DURATION_PLAYER)
+            self.game_state.start_attack(SHAKE_DURATION_PLAYER, now)
             return "spell"
         else:
             self.game_state.add_to_log("You have no spells left!")
             return "no_spells"
-        return None
-    
-    def _handle_run(self):
+
+    def _handle_run(self, now):
         """Handle run input."""
-        from .constants import RUN_CHANCES, ATTACK_VARIANCE
-        import random
-        
-        roll = random.random()
-        success_chance = RUN_CHANCES.get(self.player.difficulty, 0.4)
-        
-        if roll < success_chance:
+        run_result = combat.attempt_run(rng.combat, self.player.difficulty)
+
+        if run_result == combat.RUN_SUCCESS:
             self.game_state.add_to_log("You attempt to run away and succeed!")
             self.game_state.end_battle()
+            self.game_state.finish_attack()
+            self.game_state.start_typing(self.game_state.full_game_log, now)
+            self.game_state.set_state(TYPING, now)
             return "run_success"
         else:
-            if roll < success_chance + 0.3:
+            if run_result == combat.RUN_BLOCKED:
                 self.game_state.add_to_log("You attempt to run away but are blocked! You must stay and fight.")
                 return "run_blocked"
             else:
-                taken = random.randint(self.game_state.current_enemy.attack - ATTACK_VARIANCE, 
-                                     self.game_state.current_enemy.attack + ATTACK_VARIANCE)
+                taken = combat.roll_enemy_strike(rng.combat, self.game_state.current_enemy.attack)
                 self.player.take_damage(taken)
                 self.game_state.add_to_log("You attempt to run away but are blocked and struck down by the enemy!")
                 self.game_state.add_to_log(f"The {self.game_state.current_enemy.name} deals {taken} damage while you try to flee!")
                 return "run_failed"
-    
-    def _handle_choice_input(self, event):
+
+    def _handle_boss_input(self, event, now):
+        """Handle input during the final boss battle (no running)."""
+        if event.key == pygame.K_a:
+            if not self.game_state.is_attacking():
+                dmg = combat.roll_attack(rng.combat, self.player.attack)
+                self.game_state.current_enemy.take_damage(dmg)
+                self.game_state.add_to_log(f"You attack the Mad King for {dmg} damage!")
+                self.game_state.start_attack(SHAKE_DURATION_BOSS, now)
+                return "attack"
+        elif event.key == pygame.K_s:
+            if self.player.spells > 0 and not self.game_state.is_attacking():
+                dmg = combat.roll_spell(rng.combat, self.player.attack)
+                self.game_state.current_enemy.take_damage(dmg)
+                self.player.spells -= 1
+                self.game_state.add_to_log(f"You unleash a spell on the Mad King for {dmg} damage!")
+                self.game_state.start_attack(SHAKE_DURATION_SPELL, now)
+                return "spell"
+        elif event.key == pygame.K_r:
+            self.game_state.add_to_log("You cannot run from the Mad King!")
+            return "run_blocked"
+        return None
+
+    def _handle_choice_input(self, event, now):
         """Handle choice input (1-3 keys)."""
         try:
             idx = int(event.unicode) - 1
-            if 0 <= idx < len(self.current_choices):
-                self.game_state.add_to_log(f"> You chose: {self.current_choices[idx]['text']}")
+            if 0 <= idx < len(self.game_state.current_choices):
                 return ("choice", idx)
             else:
-                self.game_state.add_to_log("Invalid choice, please enter 1, 2, or 3.")
+                self.game_state.start_typing(["Invalid choice, please enter 1, 2, or 3."], now)
+                self.game_state.set_state(TYPING, now)
                 return "invalid_choice"
         except (ValueError, IndexError):
             return None
-    
-    def set_choices(self, choices):
-        """Set the current available choices."""
-        self.current_choices = choices
@@ -0,0 +1,74 @@
+"""
+Level image cache for Escape the Castle.
+"""
+
+import pygame
+from .constants import *
+
+
+def get_level_area_size(width, height):
+    """
+    Get the size of the level area for a given display size.
+
+    Args:
+        width (int): Display width
+        height (int): Display height
+
+    Returns:
+        tuple: (width, height) of the level area
+    """
+    return (width - 2 * HORIZONTAL_PADDING, height // 2 - BORDER_MARGIN)
+
+
+class LevelImageCache:
+    """
+    Keeps variation images pre-scaled to the level area of the current display.
+
+    With a frame color, the level area's border is drawn into each scaled
+    image once, so the framed area is a single blit.
+    """
+
+    def __init__(self, frame_color=None, frame_width=2):
+        self.frame_color = frame_color
+        self.frame_width = frame_width
+        self.display_size = None
+        self.scaled_images = {}
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        """Drop every scaled image."""
+        self.scaled_images.clear()
+
+    def get(self, image_name, source_image, width, height):
+        """
+        Get a variation image scaled to the level area, framed if enabled.
+
+        Args:
+            image_name (str): Cache key for the image (the variation file name)
+            source_image (pygame.Surface): Full-size image to scale on a miss
+            width (int): Display width
+            height (int): Display height
+
+        Returns:
+            pygame.Surface: The scaled image
+        """
+        if self.display_size != (width, height):
+            self.invalidate()
+            self.display_size = (width, height)
+
+        image = self.scaled_images.get(image_name)
+        if image is not None:
+            self.hits += 1
+            return image
+
+        self.misses += 1
+        image = pygame.transform.scale(source_image, get_level_area_size(width, height))
+        if self.frame_color:
+            pygame.draw.rect(image, self.frame_color, image.get_rect(), self.frame_width)
+        self.scaled_images[image_name] = image
+        return image
+
+    def get_stats(self):
+        """Get the cache counters."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.scaled_images)}
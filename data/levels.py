@@ -0,0 +1,166 @@
+"""
+Level variation index for Escape the Castle.
+
+randomlevel.json is checked once when it is loaded and indexed by the
+paths each variation offers, so picking a level is a constant-time draw
+from a prepared bucket instead of a filter over every variation. This
+module does not import pygame.
+"""
+
+import json
+from collections import namedtuple
+from .config import LEVEL_VARIATIONS_FILE
+
+ACTIONS = ("stairs_down", "stairs_up", "door", "hall")
+WALLS = ("left", "center", "right")
+
+# Variations to draw from, with running weight totals (None when all weigh the same)
+VariationBucket = namedtuple("VariationBucket", ["variations", "cum_weights"])
+
+
+def get_action_key(actions):
+    """Get the index key of a collection of actions, ignoring their order."""
+    return tuple(sorted(actions))
+
+
+def validate_variation(variation, index):
+    """
+    Check one entry of randomlevel.json.
+
+    Args:
+        variation: The parsed entry
+        index (int): Position of the entry in the file, for error messages
+
+    Raises:
+        ValueError: If the entry is malformed
+    """
+    if not isinstance(variation, dict):
+        raise ValueError(f"Level variation {index} is not an object")
+    for wall in WALLS:
+        if variation.get(wall) not in ACTIONS:
+            raise ValueError(f"Level variation {index} has an unknown {wall} action: {variation.get(wall)!r}")
+    if not isinstance(variation.get("image"), str):
+        raise ValueError(f"Level variation {index} has no image")
+    weight = variation.get("weight", 1)
+    if isinstance(weight, bool) or not isinstance(weight, (int, float)) or weight <= 0:
+        raise ValueError(f"Level variation {index} has an invalid weight: {weight!r}")
+
+
+class LevelVariations:
+    """
+    Validated level variations with precomputed lookup buckets.
+
+    Variations are indexed by their multiset of actions, by whether they
+    offer stairs up, and by image. An optional positive "weight" on an
+    entry makes it proportionally more likely to be drawn.
+    """
+
+    def __init__(self, variations):
+        """
+        Args:
+            variations (list): Parsed randomlevel.json entries
+
+        Raises:
+            ValueError: If the list is empty or an entry is malformed
+        """
+        if not isinstance(variations, list) or not variations:
+            raise ValueError("No level variations found")
+        for index, variation in enumerate(variations):
+            validate_variation(variation, index)
+        self.variations = variations
+
+        by_actions = {}
+        for variation in variations:
+            key = get_action_key(variation[wall] for wall in WALLS)
+            by_actions.setdefault(key, []).append(variation)
+        self.by_actions = {key: self._make_bucket(group) for key, group in by_actions.items()}
+        self.all = self._make_bucket(variations)
+        self.with_stairs_up = self._make_bucket(
+            [v for v in variations if any(v[wall] == "stairs_up" for wall in WALLS)])
+        self.without_stairs_up = self._make_bucket(
+            [v for v in variations if all(v[wall] != "stairs_up" for wall in WALLS)])
+        self.by_image = {}
+        for variation in variations:
+            self.by_image.setdefault(variation["image"], []).append(variation)
+
+    @classmethod
+    def load(cls, path=LEVEL_VARIATIONS_FILE):
+        """
+        Load and index a level variations file.
+
+        Args:
+            path (str): Path to randomlevel.json
+
+        Returns:
+            LevelVariations: The indexed variations
+
+        Raises:
+            ValueError: If the file cannot be read or fails validation
+        """
+        try:
+            with open(path, "r") as f:
+                variations = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            raise ValueError(f"Error loading {path}: {e}") from e
+        return cls(variations)
+
+    @staticmethod
+    def _make_bucket(variations):
+        """Prepare a bucket, keeping running weight totals only when weights differ."""
+        weights = [variation.get("weight", 1) for variation in variations]
+        if len(set(weights)) <= 1:
+            return VariationBucket(variations, None)
+        cum_weights = []
+        total = 0
+        for weight in weights:
+            total += weight
+            cum_weights.append(total)
+        return VariationBucket(variations, cum_weights)
+
+    @staticmethod
+    def _draw(rng, bucket):
+        """Draw one variation from a bucket."""
+        if not bucket.variations:
+            return None
+        if bucket.cum_weights is None:
+            return rng.choice(bucket.variations)
+        return rng.choices(bucket.variations, cum_weights=bucket.cum_weights)[0]
+
+    def choose(self, rng, level):
+        """
+        Draw the variation for a level.
+
+        Level 1 only draws variations without stairs up, so the player is
+        always offered three paths.
+
+        Args:
+            rng: Random source (the random module or a random.Random)
+            level (int): The player's current level
+
+        Returns:
+            dict: The variation
+        """
+        if level <= 1 and self.without_stairs_up.variations:
+            return self._draw(rng, self.without_stairs_up)
+        return self._draw(rng, self.all)
+
+    def sample(self, rng, actions):
+        """
+        Draw a variation offering exactly the given actions, in any order.
+
+        Args:
+            rng: Random source
+            actions (iterable): Three action names
+
+        Returns:
+            dict or None: The variation, or None if no variation offers them
+        """
+        bucket = self.by_actions.get(get_action_key(actions))
+        return self._draw(rng, bucket) if bucket else None
+
+    def find_by_image(self, image):
+        """Get every variation that uses an image."""
+        return self.by_image.get(image, [])
+
+    def __len__(self):
+        return len(self.variations)
@@ -2,7 +2,11 @@ import pygame
 import sys
 import os
 from .constants import *
-from .utils import load_font, load_image, get_script_dir
+from .utils import get_script_dir
+from .assets import assets
+from .preloader import preloader, get_game_asset_manifest
+from .config import PRELOAD_POLL_MS
+from .screen_loop import ScreenLoop
 
 def show_title_screen(screen, width, height):
     """
@@ -20,12 +24,16 @@ def show_title_screen(screen, width, height):
     
     # Load and scale the background image
     background_image_path = os.path.join(script_dir, "images", "title", "escapethecastle.png")
-    background_image = load_image(background_image_path, (width, height))
+    background_image = assets.image(background_image_path, (width, height))
     
     # Load custom font
     custom_font_path = os.path.join(script_dir, "fonts", "Blkchcry.TTF")
-    title_font = load_font(custom_font_path, 64)
-    button_font = load_font(custom_font_path, 36)
+    title_font = assets.font(custom_font_path, 64)
+    button_font = assets.font(custom_font_path, 36)
+    status_font = assets.font(custom_font_path, 24)
+
+    # Decode the game's images in the background while the menu is up
+    preloader.start(get_game_asset_manifest(width, height))
 
     # Load and play the background audio
     pygame.mixer.init()
@@ -52,39 +60,52 @@ def show_title_screen(screen, width, height):
     exit_button = pygame.Rect(0, 0, 300, 70)
     exit_button.center = (width // 2, height // 2 + 150)
 
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.mixer.music.stop()
-                pygame.quit()
-                sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if start_button.collidepoint(event.pos):
-                    # Don't stop music here - let it continue to welcome screen
-                    return "start"
-                if exit_button.collidepoint(event.pos):
+    # The menu only redraws on input or when loading progresses
+    with ScreenLoop("title") as loop:
+        while True:
+            for event in loop.poll():
+                if event.type == pygame.QUIT:
                     pygame.mixer.music.stop()
                     pygame.quit()
                     sys.exit()
+                if event.type == pygame.MOUSEBUTTONDOWN:
+                    if start_button.collidepoint(event.pos):
+                        # Don't stop music here - let it continue to welcome screen
+                        return "start"
+                    if exit_button.collidepoint(event.pos):
+                        pygame.mixer.music.stop()
+                        pygame.quit()
+                        sys.exit()
+
+            if not preloader.is_done():
+                if preloader.pump():
+                    loop.invalidate()
+                loop.wake_in(PRELOAD_POLL_MS)
+            if not loop.needs_redraw():
+                continue
 
-        if background_image:
-            screen.blit(background_image, (0, 0))
-        else:
-            screen.fill(DARK_GRAY)
-            
-        screen.blit(title_text, title_rect)
+            if background_image:
+                screen.blit(background_image, (0, 0))
+            else:
+                screen.fill(DARK_GRAY)
+                
+            screen.blit(title_text, title_rect)
 
-        # Draw start button
-        pygame.draw.rect(screen, BLACK, start_button, border_radius=10)
-        pygame.draw.rect(screen, GOLD, start_button, 2, border_radius=10)
-        start_text_rect = start_text.get_rect(center=start_button.center)
-        screen.blit(start_text, start_text_rect)
+            # Draw start button
+            pygame.draw.rect(screen, BLACK, start_button, border_radius=10)
+            pygame.draw.rect(screen, GOLD, start_button, 2, border_radius=10)
+            start_text_rect = start_text.get_rect(center=start_button.center)
+            screen.blit(start_text, start_text_rect)
 
-        # Draw exit button
-        pygame.draw.rect(screen, BLACK, exit_button, border_radius=10)
-        pygame.draw.rect(screen, GOLD, exit_button, 2, border_radius=10)
-        exit_text_rect = exit_text.get_rect(center=exit_button.center)
-        screen.blit(exit_text, exit_text_rect)
+            # Draw exit button
+            pygame.draw.rect(screen, BLACK, exit_button, border_radius=10)
+            pygame.draw.rect(screen, GOLD, exit_button, 2, border_radius=10)
+            exit_text_rect = exit_text.get_rect(center=exit_button.center)
+            screen.blit(exit_text, exit_text_rect)
 
-        pygame.display.flip()
+            if not preloader.is_done():
+                loaded, total = preloader.progress()
+                status_text = status_font.render(f"Loading {loaded}/{total}", True, WHITE)
+                screen.blit(status_text, status_text.get_rect(bottomright=(width - 20, height - 20)))
 
+            loop.present()
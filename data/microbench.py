@@ -0,0 +1,275 @@
+"""
+Micro-benchmarks for the text and HUD utilities of Escape the Castle.
+
+In the style of pytest-benchmark: each case is timed over several rounds
+of an automatically sized number of calls and reported with its minimum,
+median and mean time per call:
+
+    python -m data.microbench
+    python -m data.microbench --filter wrap_text --json micro.json
+
+wrap_text is timed against the original word-by-word implementation
+(reference_wrap_text) on the welcome screen's intro, on combat logs and
+on single combat lines, in several fonts and widths, and the two are
+checked to give identical lines. draw_health_bar is timed against the
+original, which draws the bar and renders its text on every call, and
+checked to draw identical pixels. Font rendering is timed with and
+without the text cache, and the player status line with and without the
+cached chrome and HUD widgets.
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import timeit
+from types import SimpleNamespace
+import pygame
+from .constants import WHITE, BLACK
+from .config import CUSTOM_FONT
+from .enemies import ENEMY_LIST
+from .text_cache import text_cache
+from .chrome import STATUS_SPACING
+from .hud import Hud, TextWidget, HealthBarWidget
+from . import utils
+from .welcome import INTRO_MESSAGE
+
+DEFAULT_ROUNDS = 5
+DEFAULT_MIN_TIME = 0.05  # Seconds per round
+WIDTHS = (400, 800)
+COMBAT_LOG_MESSAGES = 40
+SURFACE_SIZE = (1280, 720)
+BENCH_PLAYER_NAME = "Benchmark"
+
+
+def reference_wrap_text(text, width, font):
+    """The original wrap_text: measures the growing line after every word."""
+    words = text.split(' ')
+    wrapped_lines = []
+    current_line = ""
+
+    for word in words:
+        test_line = current_line + word + " "
+        if font.size(test_line)[0] < width:
+            current_line = test_line
+        else:
+            if current_line:
+                wrapped_lines.append(current_line.strip())
+            current_line = word + " "
+
+    if current_line:
+        wrapped_lines.append(current_line.strip())
+
+    return wrapped_lines
+
+
+def reference_draw_health_bar(screen, x, y, width, height, current_health, max_health, font):
+    """The original draw_health_bar: renders the health text on every call."""
+    health_percent = current_health / max_health if max_health > 0 else 0
+    color = utils.get_health_bar_color(health_percent)
+    pygame.draw.rect(screen, BLACK, pygame.Rect(x, y, width, height), border_radius=5)
+    pygame.draw.rect(screen, color, pygame.Rect(x, y, width * health_percent, height), border_radius=5)
+    text_surface = font.render(f"HP: {current_health}/{max_health}", True, WHITE)
+    screen.blit(text_surface, (x + width + 10, y))
+
+
+def reference_draw_player_status(screen, x, y, player, font):
+    """The original status line: renders every item and measures the HP text every frame."""
+    name_text = font.render(f"Name: {player.name}", True, WHITE)
+    screen.blit(name_text, (x, y))
+    x += name_text.get_width() + 20
+    reference_draw_health_bar(screen, x, y + 5, 150, 15, player.health, player.max_health, font)
+    x += 150 + 10 + font.size(f"HP: {player.health}/{player.max_health}")[0] + 20
+    lvl_text = font.render(f"Level: {player.level}", True, WHITE)
+    screen.blit(lvl_text, (x, y))
+    x += lvl_text.get_width() + 20
+    spell_text = font.render(f"Spells: {player.spells}", True, WHITE)
+    screen.blit(spell_text, (x, y))
+
+
+def get_combat_log(messages=COMBAT_LOG_MESSAGES, seed=0):
+    """Get a paragraph of combat messages like the game writes."""
+    rng = random.Random(seed)
+    lines = []
+    for _ in range(messages):
+        name = rng.choice(ENEMY_LIST)["name"]
+        lines.append(rng.choice([
+            f"You attack {name} for {rng.randint(15, 25)} damage!",
+            f"{name} attacks you for {rng.randint(5, 30)} damage!",
+            f"You unleash a spell on {name} for {rng.randint(30, 60)} damage!",
+            "You attempt to run away but are blocked! You must stay and fight.",
+        ]))
+    return " ".join(lines)
+
+
+def get_texts():
+    """Get the benchmark texts by name."""
+    return {
+        "combat line": "You unleash a spell on a large troll for 47 damage!",
+        "combat log": get_combat_log(),
+        "intro": " ".join(line for line in INTRO_MESSAGE if line),
+    }
+
+
+def get_fonts():
+    """Get the benchmark fonts by name."""
+    return {
+        "blackchancery 20": utils.load_font(CUSTOM_FONT, 20),
+        "blackchancery 24": utils.load_font(CUSTOM_FONT, 24),
+        "default 18": pygame.font.Font(None, 18),
+    }
+
+
+def time_case(func, rounds=DEFAULT_ROUNDS, min_time=DEFAULT_MIN_TIME):
+    """
+    Time a function.
+
+    Args:
+        func (callable): Function to call with no arguments
+        rounds (int): Number of timed rounds
+        min_time (float): Seconds each round should take at least
+
+    Returns:
+        dict: Calls per round, and the min, median and mean seconds per call
+    """
+    timer = timeit.Timer(func)
+    number = 1
+    while timer.timeit(number) < min_time:
+        number *= 2
+    per_call = [total / number for total in timer.repeat(repeat=rounds, number=number)]
+    return {"calls": number, "min": min(per_call), "median": statistics.median(per_call),
+            "mean": statistics.mean(per_call)}
+
+
+def get_cases():
+    """
+    Get every benchmark case.
+
+    Returns:
+        list: (group, name, function) tuples
+    """
+    cases = []
+    texts = get_texts()
+    fonts = get_fonts()
+    for font_name, font in fonts.items():
+        for text_name, text in texts.items():
+            for width in WIDTHS:
+                group = f"wrap_text[{text_name}, {font_name}, {width}px]"
+                cases.append((group, "reference", lambda t=text, w=width, f=font: reference_wrap_text(t, w, f)))
+                cases.append((group, "optimized", lambda t=text, w=width, f=font: utils.wrap_text(t, w, f)))
+
+    screen = pygame.Surface(SURFACE_SIZE)
+    font = fonts["default 18"]
+    group = "draw_health_bar"
+    cases.append((group, "reference", lambda: reference_draw_health_bar(screen, 100, 650, 200, 20, 73, 130, font)))
+    cases.append((group, "optimized", lambda: utils.draw_health_bar(screen, 100, 650, 200, 20, 73, 130, font)))
+
+    # An idle frame: no widget value changed, and the name is part of the panel chrome
+    player = SimpleNamespace(name=BENCH_PLAYER_NAME, health=73, max_health=130, level=7, spells=2)
+    hud = Hud([HealthBarWidget(font, y_offset=5), TextWidget(font, "Level: {}", ("level",)),
+               TextWidget(font, "Spells: {}", ("spells",))], STATUS_SPACING)
+
+    def draw_status():
+        hud.update(player)
+        hud.draw(screen, 100, 10)
+
+    group = "player status"
+    cases.append((group, "reference", lambda: reference_draw_player_status(screen, 10, 10, player, font)))
+    cases.append((group, "optimized", draw_status))
+
+    for font_name, font in fonts.items():
+        for text_name in ("combat line", "intro"):
+            text = texts[text_name][:120]
+            group = f"render[{text_name}, {font_name}]"
+            cases.append((group, "font.render", lambda t=text, f=font: f.render(t, True, WHITE)))
+            cases.append((group, "text_cache", lambda t=text, f=font: text_cache.render(f, t, WHITE)))
+    return cases
+
+
+def check_wrap_text():
+    """
+    Check that wrap_text gives the same lines as the original.
+
+    Returns:
+        list: Descriptions of every difference
+    """
+    differences = []
+    for font_name, font in get_fonts().items():
+        for text_name, text in get_texts().items():
+            for width in (0, 50, 120) + WIDTHS + (2000,):
+                expected = reference_wrap_text(text, width, font)
+                if utils.wrap_text(text, width, font) != expected:
+                    differences.append(f"{text_name}, {font_name}, {width}px")
+    return differences
+
+
+def check_health_bar():
+    """
+    Check that draw_health_bar draws the same pixels as the original.
+
+    Returns:
+        list: Descriptions of every difference
+    """
+    differences = []
+    font = get_fonts()["blackchancery 20"]
+    for max_health in (1, 100, 130):
+        for health in range(0, max_health + 1):
+            drawn = []
+            for draw in (reference_draw_health_bar, utils.draw_health_bar):
+                screen = pygame.Surface((400, 40))
+                screen.fill((90, 60, 30))
+                draw(screen, 10, 10, 150, 15, health, max_health, font)
+                drawn.append(pygame.image.tobytes(screen, "RGB"))
+            if drawn[0] != drawn[1]:
+                differences.append(f"{health}/{max_health}")
+    return differences
+
+
+def main():
+    """Run the micro-benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description="Micro-benchmark Escape the Castle's text utilities.")
+    parser.add_argument("--filter", default="", help="Only run groups containing this text")
+    parser.add_argument("--rounds", type=int, default=DEFAULT_ROUNDS)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME, help="Seconds per round")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    # HUD widgets are converted to the display format
+    pygame.display.set_mode(SURFACE_SIZE)
+    differences = check_wrap_text()
+    for difference in differences:
+        print(f"wrap_text differs from the original: {difference}")
+    bar_differences = check_health_bar()
+    for difference in bar_differences:
+        print(f"draw_health_bar differs from the original at {difference}")
+    differences += bar_differences
+
+    results = {}
+    for group, name, func in get_cases():
+        if args.filter not in group:
+            continue
+        stats = time_case(func, args.rounds, args.min_time)
+        results.setdefault(group, {})[name] = stats
+        print(f"{group:<52} {name:<12} {stats['median'] * 1e6:10.2f} us "
+              f"(min {stats['min'] * 1e6:.2f}, {stats['calls']} calls)")
+
+    print()
+    print("Speedups (median):")
+    for group, stats in results.items():
+        names = list(stats)
+        if len(names) == 2:
+            before, after = stats[names[0]]["median"], stats[names[1]]["median"]
+            print(f"{group:<52} {before / after:6.2f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if differences else 0)
+
+
+if __name__ == "__main__":
+    main()
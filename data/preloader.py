@@ -0,0 +1,168 @@
+"""
+Background asset preloading for Escape the Castle.
+"""
+
+import os
+import pygame
+from concurrent.futures import ThreadPoolExecutor
+from .config import (IMAGES_DIR, GAME_BACKGROUND, MAD_KING_IMAGE, GAMEOVER_IMAGE,
+                     VICTORY_IMAGE)
+from .constants import *
+from .assets import assets
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+# The Mad King sprite, prefetched by the game near the end instead of with the other screens
+BOSS_ASSET = (MAD_KING_IMAGE, ENEMY_IMAGE_SIZE, True)
+
+
+def list_images(directory):
+    """List the image files in a directory, sorted by name."""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(os.path.join(directory, filename) for filename in os.listdir(directory)
+                  if filename.endswith(IMAGE_EXTENSIONS))
+
+
+def get_game_asset_manifest(width, height):
+    """
+    Get every image the game screens load, as asset manager keys.
+
+    Args:
+        width (int): Display width
+        height (int): Display height
+
+    Returns:
+        list: (path, size, convert_alpha) tuples
+    """
+    manifest = [(GAME_BACKGROUND, (width, height), False)]
+    manifest.extend((path, None, False)
+                    for path in list_images(os.path.join(IMAGES_DIR, "game", "variations")))
+    # madking.png lives in the enemies directory, but the game prefetches it near the end
+    manifest.extend((path, ENEMY_IMAGE_SIZE, True)
+                    for path in list_images(os.path.join(IMAGES_DIR, "game", "enemies"))
+                    if path != MAD_KING_IMAGE)
+    manifest.append((GAMEOVER_IMAGE, (width, height), False))
+    manifest.append((VICTORY_IMAGE, (width, height), False))
+    return manifest
+
+
+def decode_image(path, size):
+    """
+    Decode and scale an image file. Safe to call from a worker thread.
+
+    Args:
+        path (str): Path to the image file
+        size (tuple): Optional (width, height) to scale to
+
+    Returns:
+        pygame.Surface or None: The unconverted surface
+    """
+    try:
+        image = pygame.image.load(path)
+    except (pygame.error, FileNotFoundError) as e:
+        print(f"Failed to preload image {path}: {e}")
+        return None
+    if size:
+        try:
+            image = pygame.transform.smoothscale(image, size)
+        except ValueError:
+            # Palette images cannot be smoothscaled before conversion
+            pass
+    return image
+
+
+class AssetPreloader:
+    """
+    Decodes images on a thread pool while menus are showing.
+
+    Decoding and scaling run on worker threads. Converting to the display
+    format must happen on the main thread, so menus call pump() once per
+    frame to move finished images into the asset manager.
+    """
+
+    def __init__(self, asset_manager=assets, max_workers=2):
+        self.asset_manager = asset_manager
+        self.max_workers = max_workers
+        self.executor = None
+        self.pending = {}
+        self.total = 0
+        self.completed = 0
+
+    def start(self, manifest):
+        """
+        Queue images for background decoding.
+
+        Args:
+            manifest (list): (path, size, convert_alpha) tuples to load
+        """
+        for path, size, convert_alpha in manifest:
+            key = (path, tuple(size) if size else None, convert_alpha)
+            if key in self.pending or self.asset_manager.has_image(*key):
+                continue
+            if self.asset_manager.in_pack(*key):
+                # Baked images only need a copy, so there is nothing to hand off
+                self.asset_manager.image(*key)
+                self.total += 1
+                self.completed += 1
+                continue
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                   thread_name_prefix="preload")
+            self.pending[key] = self.executor.submit(decode_image, path, key[1])
+            self.total += 1
+
+    def pump(self, max_items=2):
+        """
+        Convert finished images on the main thread.
+
+        Args:
+            max_items (int or None): Most images to convert this call, None for no limit
+
+        Returns:
+            int: Number of images added to the asset manager
+        """
+        converted = 0
+        for key, future in list(self.pending.items()):
+            if max_items is not None and converted >= max_items:
+                break
+            if not future.done():
+                continue
+            del self.pending[key]
+            self._store(key, future.result())
+            converted += 1
+        return converted
+
+    def finish(self):
+        """Wait for every queued image and convert it."""
+        for key, future in list(self.pending.items()):
+            self._store(key, future.result())
+        self.pending.clear()
+
+    def _store(self, key, image):
+        """Convert a decoded image and hand it to the asset manager."""
+        path, size, convert_alpha = key
+        self.completed += 1
+        if self.asset_manager.has_image(*key):
+            return
+        if image is not None:
+            image = image.convert_alpha() if convert_alpha else image.convert()
+            if size and image.get_size() != size:
+                image = pygame.transform.smoothscale(image, size)
+        self.asset_manager.store_image(key, image)
+
+    def progress(self):
+        """
+        Get the loading progress.
+
+        Returns:
+            tuple: (images completed, images queued)
+        """
+        return self.completed, self.total
+
+    def is_done(self):
+        """Check whether every queued image has been converted."""
+        return not self.pending
+
+
+# Shared preloader started by the main menu
+preloader = AssetPreloader()
@@ -0,0 +1,192 @@
+"""
+Frame-time profiler for Escape the Castle.
+
+Enable it with ETC_PROFILE=1. Each frame is split into named stages with
+lap(): the time since the previous lap (or since begin_frame) is charged
+to the stage being named. Game frames are also charged as a whole to the
+state the game was in ("frame:battle", ...). The last PROFILE_WINDOW
+frames are kept for percentiles, an on-screen overlay shows them while
+the game runs, and the results are written to ETC_PROFILE_OUTPUT (.json
+or .csv) at exit. Counters (count()) tally events such as Surface
+allocations and are kept even with timing off, so data.benchmark can
+read them per frame.
+"""
+
+import atexit
+import csv
+import json
+import time
+from collections import deque
+import pygame
+from .config import PROFILE_ENABLED, PROFILE_OUTPUT, PROFILE_WINDOW
+from .constants import *
+
+FRAME_STAGE = "frame"
+HISTOGRAM_BUCKET_MS = 1
+HISTOGRAM_MAX_MS = 50
+OVERLAY_REFRESH_MS = 500
+STAGE_WIDTH = 21  # Overlay column for stage names, long enough for "frame:combat_finished"
+
+
+def get_percentile(sorted_samples, fraction):
+    """Get a percentile from an already sorted list of samples."""
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+class FrameProfiler:
+    """Collects per-stage frame timings and reports them."""
+
+    def __init__(self, enabled=False, window=PROFILE_WINDOW):
+        self.enabled = enabled
+        self.window = window
+        self.samples = {}
+        self.totals = {}
+        self.frame_stages = {}
+        self.frame_start = 0.0
+        self.last_lap = 0.0
+        self.overlay_lines = []
+        self.overlay_time = 0
+        self.counts = {}
+
+    def begin_frame(self):
+        """Start timing a frame."""
+        if not self.enabled:
+            return
+        self.frame_start = self.last_lap = time.perf_counter()
+
+    def lap(self, stage):
+        """
+        Charge the time since the previous lap to a stage.
+
+        A stage may be lapped several times in one frame; its times are
+        summed into a single sample when the frame ends.
+
+        Args:
+            stage (str): Stage name (e.g. "input", "simulation", "flip")
+        """
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.frame_stages[stage] = self.frame_stages.get(stage, 0.0) + (now - self.last_lap) * 1000
+        self.last_lap = now
+
+    def count(self, counter, amount=1):
+        """
+        Add to a running counter. Counting is cheap and ignores enabled.
+
+        Args:
+            counter (str): Counter name (e.g. "enemy_surfaces")
+            amount (int): How much to add
+        """
+        self.counts[counter] = self.counts.get(counter, 0) + amount
+
+    def end_frame(self, state=None):
+        """
+        Finish timing a frame and record its total duration.
+
+        Args:
+            state (str or None): Game state the frame was spent in; its total
+                is also recorded as the stage "frame:<state>"
+        """
+        if not self.enabled:
+            return
+        for stage, elapsed_ms in self.frame_stages.items():
+            self._record(stage, elapsed_ms)
+        self.frame_stages.clear()
+        elapsed_ms = (time.perf_counter() - self.frame_start) * 1000
+        self._record(FRAME_STAGE, elapsed_ms)
+        if state:
+            self._record(f"{FRAME_STAGE}:{state}", elapsed_ms)
+
+    def _record(self, stage, elapsed_ms):
+        """Add one sample to a stage's rolling window."""
+        samples = self.samples.get(stage)
+        if samples is None:
+            samples = self.samples[stage] = deque(maxlen=self.window)
+            self.totals[stage] = 0
+        samples.append(elapsed_ms)
+        self.totals[stage] += 1
+
+    def get_summary(self):
+        """
+        Get statistics for every stage over the rolling window.
+
+        Returns:
+            dict: Stage name -> count, mean, p50, p95, p99, max and histogram (ms)
+        """
+        summary = {}
+        for stage, samples in self.samples.items():
+            ordered = sorted(samples)
+            histogram = {}
+            for sample in ordered:
+                bucket = min(int(sample // HISTOGRAM_BUCKET_MS) * HISTOGRAM_BUCKET_MS, HISTOGRAM_MAX_MS)
+                histogram[bucket] = histogram.get(bucket, 0) + 1
+            summary[stage] = {
+                "count": self.totals[stage],
+                "mean": sum(ordered) / len(ordered),
+                "p50": get_percentile(ordered, 0.50),
+                "p95": get_percentile(ordered, 0.95),
+                "p99": get_percentile(ordered, 0.99),
+                "max": ordered[-1],
+                "histogram": histogram,
+            }
+        return summary
+
+    def draw_overlay(self, screen, font):
+        """
+        Draw the per-stage percentiles in the top-left corner.
+
+        Args:
+            screen (pygame.Surface): Surface to draw on
+            font (pygame.font.Font): Font for the overlay text
+
+        Returns:
+            pygame.Rect or None: The area drawn, None when disabled
+        """
+        if not self.enabled:
+            return None
+        now = pygame.time.get_ticks()
+        if not self.overlay_lines or now - self.overlay_time > OVERLAY_REFRESH_MS:
+            self.overlay_time = now
+            lines = [f"{'stage':<{STAGE_WIDTH}} {'p50':>6} {'p95':>6} {'p99':>6} ms"]
+            for stage, stats in self.get_summary().items():
+                lines.append(f"{stage:<{STAGE_WIDTH}} {stats['p50']:6.2f} {stats['p95']:6.2f} {stats['p99']:6.2f}")
+            self.overlay_lines = [font.render(line, True, YELLOW) for line in lines]
+
+        width = max(line.get_width() for line in self.overlay_lines) + 10
+        height = len(self.overlay_lines) * TEXT_LINE_HEIGHT + 10
+        rect = pygame.Rect(10, 10, width, height)
+        screen.fill(BLACK, rect)
+        for i, line in enumerate(self.overlay_lines):
+            screen.blit(line, (rect.x + 5, rect.y + 5 + i * TEXT_LINE_HEIGHT))
+        return rect
+
+    def dump(self, path=PROFILE_OUTPUT):
+        """
+        Write the summary to a JSON or CSV file.
+
+        Args:
+            path (str): Output file; a .csv extension writes CSV, anything else JSON
+        """
+        if not self.enabled or not self.samples:
+            return
+        summary = self.get_summary()
+        if path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["stage", "count", "mean", "p50", "p95", "p99", "max"])
+                for stage, stats in summary.items():
+                    writer.writerow([stage, stats["count"]] +
+                                    [f"{stats[k]:.3f}" for k in ("mean", "p50", "p95", "p99", "max")])
+        else:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+
+
+# Shared profiler for the game loops
+profiler = FrameProfiler(PROFILE_ENABLED)
+if profiler.enabled:
+    atexit.register(profiler.dump)
@@ -2,16 +2,37 @@
 Rendering system for Escape the Castle game.
 """
 
+import os
 import pygame
-import random
 from .constants import *
-from .utils import wrap_text, draw_health_bar
+from .config import DIRTY_RECT_RENDERING, MAD_KING_IMAGE
+from .level_cache import LevelImageCache
+from .text_cache import text_cache
+from .dirty_rects import DirtyRectRenderer
+from .camera import Camera
+from .chrome import PanelChrome, get_panel_rect, get_log_rect, get_input_rect, PANEL_PADDING, STATUS_SPACING
+from .hud import Hud, TextWidget, HealthBarWidget
+from .profiler import profiler
+from .assets import assets
+
+# Screen regions of the game scene, in drawing order
+REGIONS = ("top", "panel", "instruction")
 
 class Renderer:
-    """Handles all game rendering."""
-    
+    """
+    Handles all game rendering.
+
+    With dirty-rect rendering enabled, only the regions whose contents
+    changed since the previous frame are redrawn and marked for update.
+    The current state declares which regions can change while it is
+    active; the others are only checked again when the state changes.
+    The scene is composed on the camera's canvas, which screen points to,
+    and the camera presents it with any screen shake applied.
+    """
+
     def __init__(self, screen, width, height, font, small_font):
         self.screen = screen
+        self.camera = Camera(screen)
         self.width = width
         self.height = height
         self.font = font
@@ -19,180 +40,244 @@ class Renderer:
         self.background_image = None
         self.variation_images = {}
         self.enemy_images = {}
-    
+        self.level_image_cache = LevelImageCache(frame_color=GOLD)
+        self.panel_chrome = PanelChrome()
+        self.hud = Hud([
+            HealthBarWidget(small_font, y_offset=5),
+            TextWidget(small_font, "Level: {}", ("level",)),
+            TextWidget(small_font, "Spells: {}", ("spells",)),
+        ], STATUS_SPACING)
+        self.dirty_renderer = DirtyRectRenderer(DIRTY_RECT_RENDERING)
+        self.drawn_state = None
+        self.drawn_enemy = None
+
     def load_background(self, image_path):
         """Load the background image."""
-        from .utils import load_image
-        self.background_image = load_image(image_path, (self.width, self.height))
-    
+        self.background_image = assets.image(image_path, (self.width, self.height))
+
     def load_variation_images(self, script_dir):
         """Load all variation images."""
-        from .utils import load_image
-        import os
-        
         image_dir = os.path.join(script_dir, "images", "game", "variations")
         if not os.path.isdir(image_dir):
             print(f"Variation image directory not found: {image_dir}")
             return
-            
+
         for filename in os.listdir(image_dir):
             if filename.endswith(('.png', '.jpg', '.jpeg')):
                 img_path = os.path.join(image_dir, filename)
-                image = load_image(img_path)
+                image = assets.image(img_path)
                 if image:
                     self.variation_images[filename] = image
-    
+
     def load_enemy_images(self, script_dir):
-        """Load all enemy images."""
-        from .utils import load_image
-        import os
-        
+        """Load all enemy images but the Mad King's, which the game prefetches."""
         image_dir = os.path.join(script_dir, "images", "game", "enemies")
         if not os.path.isdir(image_dir):
             print(f"Enemy image directory not found: {image_dir}")
             return
-            
+
         for filename in os.listdir(image_dir):
-            if filename.endswith(('.png', '.jpg', '.jpeg')):
+            if filename.endswith(('.png', '.jpg', '.jpeg')) and filename != os.path.basename(MAD_KING_IMAGE):
                 img_path = os.path.join(image_dir, filename)
-                image = load_image(img_path, ENEMY_IMAGE_SIZE, convert_alpha=True)
+                image = assets.image(img_path, ENEMY_IMAGE_SIZE, convert_alpha=True)
                 if image:
                     name = os.path.splitext(filename)[0].lower().replace(" ", "_")
                     self.enemy_images[name] = image
-    
-    def draw_background(self, offset_x=0, offset_y=0):
-        """Draw the background with optional offset for screen shake."""
-        if self.background_image:
-            self.screen.blit(self.background_image, (0 + offset_x, 0 + offset_y))
+
+    def get_enemy_image(self, enemy_name):
+        """Get an enemy's image by its name, or None."""
+        return self.enemy_images.get(enemy_name.lower().replace(" ", "_"))
+
+    def invalidate(self):
+        """Redraw everything on the next frame (e.g. after a menu drew over the screen)."""
+        self.dirty_renderer.invalidate()
+
+    def draw_background(self, rect=None):
+        """Draw the background, or only the part under rect."""
+        if rect is None:
+            if self.background_image:
+                self.screen.blit(self.background_image, (0, 0))
+            else:
+                self.screen.fill(DARK_GRAY)
+        elif self.background_image:
+            self.screen.blit(self.background_image, rect, area=rect)
         else:
-            self.screen.fill(DARK_GRAY)
-    
+            self.screen.fill(DARK_GRAY, rect)
+
     def draw_level_area(self, player):
         """Draw the level area with the current level image."""
         level_area_height = self.height // 2
         rect = pygame.Rect(HORIZONTAL_PADDING, BORDER_MARGIN,
                           self.width - 2 * HORIZONTAL_PADDING,
                           level_area_height - BORDER_MARGIN)
-        pygame.draw.rect(self.screen, BLACK, rect)
-        
+
         image = None
         if player.current_level_data:
             image = self.get_level_image(player.current_level_data["image"])
-        
+
         if image:
-            self.screen.blit(image, image.get_rect(center=rect.center))
+            # The cached image covers the whole area and has the frame drawn in
+            self.screen.blit(image, rect)
         else:
-            text = self.font.render(f"Level {player.level} | No Image Found", True, WHITE)
+            pygame.draw.rect(self.screen, BLACK, rect)
+            text = text_cache.render(self.font, f"Level {player.level} | No Image Found", WHITE)
             self.screen.blit(text, text.get_rect(center=rect.center))
-        
-        pygame.draw.rect(self.screen, GOLD, rect, 2)
-    
+            pygame.draw.rect(self.screen, GOLD, rect, 2)
+
     def get_level_image(self, image_path):
-        """Get a scaled level image."""
-        import os
+        """Get a level image already scaled to the level area."""
         image_name = os.path.basename(image_path)
         image = self.variation_images.get(image_name)
         if image:
-            level_area_width = self.width - 2 * HORIZONTAL_PADDING
-            level_area_height = self.height // 2 - BORDER_MARGIN
-            return pygame.transform.scale(image, (level_area_width, level_area_height))
+            return self.level_image_cache.get(image_name, image, self.width, self.height)
         return None
-    
-    def draw_enemy(self, enemy_image, enemy_alpha, is_player_attacking):
+
+    def draw_enemy(self, enemy_sprite, is_player_attacking, blend=1.0):
         """Draw the current enemy with fade and shake effects."""
-        if enemy_image:
-            if is_player_attacking:
-                enemy_rect = enemy_image.get_rect(center=(self.width // 2, self.height // 4))
-                shaked_rect = enemy_rect.move(random.randint(-ENEMY_SHAKE_OFFSET, ENEMY_SHAKE_OFFSET), 
-                                            random.randint(-ENEMY_SHAKE_OFFSET, ENEMY_SHAKE_OFFSET))
-                enemy_img = enemy_image.copy()
-                enemy_img.set_alpha(enemy_alpha)
-                self.screen.blit(enemy_img, shaked_rect)
-            else:
-                enemy_img = enemy_image.copy()
-                enemy_img.set_alpha(enemy_alpha)
-                self.screen.blit(enemy_img, enemy_img.get_rect(center=(self.width // 2, self.height // 4)))
-    
-    def draw_game_ui(self, player, game_log, offset_x=0, offset_y=0):
-        """Draw the game UI with player status and log."""
-        top_area_height = self.height // 2
-        bottom_area_height = self.height - top_area_height
-        padding = 10
-        
-        rect = pygame.Rect(HORIZONTAL_PADDING + offset_x, top_area_height + BORDER_MARGIN + offset_y,
-                          self.width - 2 * HORIZONTAL_PADDING,
-                          bottom_area_height - BORDER_MARGIN * 2)
-        pygame.draw.rect(self.screen, BLACK, rect)
-        pygame.draw.rect(self.screen, GOLD, rect, 2)
-        
+        enemy_sprite.draw(self.screen, (self.width // 2, self.height // 4),
+                          shake=is_player_attacking, blend=blend)
+
+    def draw_game_ui(self, player, game_log, typing_line=None):
+        """
+        Draw the game UI with player status and log.
+
+        The static chrome is one cached surface; only the status values and
+        the log are drawn on top of it.
+        """
+        rect = get_panel_rect(self.width, self.height)
+        self.screen.blit(self.panel_chrome.get(self.width, self.height, self.small_font, player.name), rect)
+
         # Draw Player Status
-        self._draw_player_status(rect, padding, player)
-        
+        self._draw_player_status(rect, player)
+
         # Draw Game Log
-        self._draw_game_log(rect, padding, game_log)
-        
-        # Draw Input Box
-        self._draw_input_box(rect, padding)
-    
-    def _draw_player_status(self, rect, padding, player):
-        """Draw the player status bar."""
-        status_y = rect.y + padding
-        x_cursor = rect.x + padding
-        
-        # Name
-        name_text = self.small_font.render(f"Name: {player.name}", True, WHITE)
-        self.screen.blit(name_text, (x_cursor, status_y))
-        x_cursor += name_text.get_width() + 20
-        
-        # Health Bar
-        health_bar_width = 150
-        health_bar_height = 15
-        draw_health_bar(self.screen, x_cursor, status_y + 5, health_bar_width, health_bar_height, 
-                       player.health, player.max_health, self.small_font)
-        x_cursor += health_bar_width + 10 + self.small_font.size(f"HP: {player.health}/{player.max_health}")[0] + 20
-        
-        # Level
-        lvl_text = self.small_font.render(f"Level: {player.level}", True, WHITE)
-        self.screen.blit(lvl_text, (x_cursor, status_y))
-        x_cursor += lvl_text.get_width() + 20
-        
-        # Spells
-        spell_text = self.small_font.render(f"Spells: {player.spells}", True, WHITE)
-        self.screen.blit(spell_text, (x_cursor, status_y))
-    
-    def _draw_game_log(self, rect, padding, game_log):
+        self._draw_game_log(rect, game_log, typing_line)
+
+    def _draw_player_status(self, rect, player):
+        """Draw the changing part of the player status bar, after the name."""
+        self.hud.update(player)
+        self.hud.draw(self.screen, rect.x + self.panel_chrome.status_x, rect.y + PANEL_PADDING)
+
+    def _draw_game_log(self, rect, game_log, typing_line=None):
         """Draw the game log area."""
-        log_area_rect = pygame.Rect(rect.x + padding, rect.y + 30 + padding,
-                                   rect.width - 2 * padding,
-                                   rect.height - 30 - 2 * padding - 50)
-        
+        log_area_rect = get_log_rect(rect)
+        # A long log runs past its area; the input box below stays on top of it
+        input_top = get_input_rect(rect).y
+        clip = self.screen.get_clip()
+        self.screen.set_clip(pygame.Rect(rect.x, rect.y, rect.width, input_top - rect.y).clip(clip))
+
         y_offset = log_area_rect.y
-        
-        for line in game_log:
-            wrapped_lines = wrap_text(line, log_area_rect.width - 20, self.small_font)
-            for wrapped_line in wrapped_lines:
-                line_surface = self.small_font.render(wrapped_line, True, WHITE)
+
+        # The line being typed changes every frame, so it is not kept in the text cache
+        for index, line in enumerate(game_log):
+            for line_surface in text_cache.layout(self.small_font, line, log_area_rect.width - 20, WHITE,
+                                                  cache=index != typing_line):
                 self.screen.blit(line_surface, (log_area_rect.x, y_offset))
                 y_offset += TEXT_LINE_HEIGHT
                 if y_offset > log_area_rect.y + log_area_rect.height:
                     break
             if y_offset > log_area_rect.y + log_area_rect.height:
                 break
-    
-    def _draw_input_box(self, rect, padding):
-        """Draw the input box."""
-        input_box_height = 50
-        input_rect = pygame.Rect(rect.x + padding,
-                                rect.y + rect.height - input_box_height - padding,
-                                rect.width - 2 * padding, input_box_height)
-        pygame.draw.rect(self.screen, DARK_GRAY, input_rect, border_radius=10)
-        pygame.draw.rect(self.screen, GOLD, input_rect, 2, border_radius=10)
-    
+        self.screen.set_clip(clip)
+
     def draw_instruction(self, instruction_text):
         """Draw instruction text at the bottom of the screen."""
-        surface = self.small_font.render(instruction_text, True, WHITE)
+        surface = text_cache.render(self.small_font, instruction_text, WHITE)
         self.screen.blit(surface, surface.get_rect(center=(self.width // 2, self.height - 20)))
-    
-    def flip_display(self):
-        """Update the display."""
-        pygame.display.flip()
+
+    def draw_scene(self, game_state, player, state, blend=1.0):
+        """
+        Draw a game frame.
+
+        Screen shake is left to the camera, so the scene is drawn unshaken.
+        blend is the scheduler's position between fixed updates, used to
+        smooth the enemy fade.
+
+        Args:
+            game_state (GameState): What to draw
+            player (Player): The player
+            state (State): The current state, which names the instruction
+                and the regions that can change while it is active
+            blend (float): Position between the last two fixed updates
+        """
+        self.screen = self.camera.get_canvas()
+        enemy_sprite = game_state.enemy_sprite
+        enemy_center = (self.width // 2, self.height // 4)
+        top_rect = pygame.Rect(HORIZONTAL_PADDING, BORDER_MARGIN,
+                               self.width - 2 * HORIZONTAL_PADDING, self.height // 2 - BORDER_MARGIN)
+        if enemy_sprite.image:
+            top_rect.union_ip(enemy_sprite.image.get_rect(center=enemy_center))
+        panel_rect = get_panel_rect(self.width, self.height)
+        instruction_rect = pygame.Rect(0, self.height - BORDER_MARGIN, self.width, BORDER_MARGIN)
+
+        dirty_renderer = self.dirty_renderer
+        # Regions the state cannot change are only checked when it changes.
+        # The enemy fades across states, so the top is checked while one is shown.
+        full = dirty_renderer.needs_full_redraw()
+        if full or self.drawn_state is not state:
+            regions = REGIONS
+        else:
+            regions = state.redraws
+            if enemy_sprite.image or self.drawn_enemy:
+                regions = regions + ("top",)
+        self.drawn_state = state
+        self.drawn_enemy = enemy_sprite.image
+
+        enemy_shake = game_state.is_player_attacking
+        top_dirty = panel_dirty = instruction_dirty = False
+        if "top" in regions:
+            # enemy_shake is part of the signature so the enemy is redrawn in place once it stops shaking
+            top_signature = (player.current_level_data and player.current_level_data["image"], player.level,
+                             enemy_sprite.image, enemy_sprite.get_draw_alpha(blend), top_rect.size, enemy_shake)
+            top_dirty = dirty_renderer.changed("top", top_signature) or enemy_shake
+        if "panel" in regions:
+            panel_dirty = dirty_renderer.changed("panel", (tuple(game_state.get_display_log()), player.name,
+                                                           player.health, player.max_health, player.level,
+                                                           player.spells))
+        if "instruction" in regions:
+            instruction_dirty = dirty_renderer.changed("instruction", state.instruction)
+
+        if top_dirty:
+            # The enemy may have faded out since last frame, so clear the old area as well
+            top_update_rect = dirty_renderer.track_rect("top", top_rect)
+        if full:
+            self.draw_background()
+        if top_dirty:
+            if not full:
+                self.draw_background(top_update_rect)
+            profiler.lap("background")
+            self.draw_level_area(player)
+            profiler.lap("level")
+            self.draw_enemy(enemy_sprite, enemy_shake, blend)
+            profiler.lap("enemy")
+            dirty_renderer.mark(top_update_rect)
+            panel_dirty = panel_dirty or top_update_rect.colliderect(panel_rect)
+        profiler.lap("background")
+        if panel_dirty:
+            self.draw_game_ui(player, game_state.get_display_log(), typing_line=game_state.get_typing_line())
+            dirty_renderer.mark(panel_rect)
+        if instruction_dirty:
+            if not full:
+                self.draw_background(instruction_rect)
+            self.draw_instruction(state.instruction)
+            dirty_renderer.mark(instruction_rect)
+        profiler.lap("ui")
+
+    def finish_frame(self, scheduler, state):
+        """
+        Draw the profiler overlay, show the frame through the camera, then wait
+        for the frame rate cap.
+
+        Args:
+            scheduler (FrameScheduler): The session's scheduler
+            state (State): The current state, whose frame cost the frame is charged to
+        """
+        overlay_rect = profiler.draw_overlay(self.screen, self.small_font)
+        if overlay_rect:
+            self.dirty_renderer.mark(overlay_rect)
+        profiler.lap("ui")
+        self.camera.present(self.dirty_renderer)
+        profiler.lap("flip")
+        scheduler.end_frame()
+        profiler.lap("wait")
+        profiler.end_frame(state.name)
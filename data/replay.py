@@ -0,0 +1,327 @@
+"""
+Session recording and replay for Escape the Castle.
+
+Every session plays from a seed (see data.rng). With ETC_RECORD_DIR set,
+each session also writes a compact binary input log: a header with the
+seed and the player, one record per key press with the update tick it
+was handled on, and the player's final state. Game state only changes
+in fixed updates and in response to those keys, so replaying the log
+reproduces the session exactly:
+
+    python -m data.replay sessions/*.etcr
+
+Replays run headless on SDL's dummy video driver, one update per frame
+as fast as possible, and check the final state against the recording.
+"""
+
+import argparse
+import os
+import struct
+import sys
+import time
+from collections import namedtuple
+import pygame
+from .config import SEED, RECORD_DIR, UPDATE_RATE
+from .constants import TYPING_DELAY
+from .rng import rng
+from .scheduler import FrameScheduler
+from .utils import parse_size
+
+MAGIC = b"ETCR"
+VERSION = 1
+LOG_EXTENSION = ".etcr"
+# magic, version, seed, update rate, typing delay, starting level, starting health
+HEADER = struct.Struct("<4sBQHHhh")
+STRING_LENGTH = struct.Struct("<H")
+# tick, key, unicode code point
+RECORD = struct.Struct("<III")
+# level, health, max health, spells
+FOOTER = struct.Struct("<hhhh")
+END_KEY = 0xFFFFFFFF
+REPLAY_SIZE = (1280, 720)
+
+SessionLog = namedtuple("SessionLog", ["seed", "update_rate", "typing_delay", "name", "difficulty",
+                                       "starting_level", "starting_health", "records", "end_tick",
+                                       "final_state"])
+
+
+def get_final_state(player):
+    """Get the player fields stored at the end of a log."""
+    return (player.level, player.health, player.max_health, player.spells)
+
+
+class InputRecorder:
+    """Writes a session's key presses to an input log as they happen."""
+
+    def __init__(self, path, seed, player):
+        """
+        Args:
+            path (str): Log file to create
+            seed (int): Session seed
+            player (Player): The player at the start of the session
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, UPDATE_RATE, TYPING_DELAY,
+                                    player.starting_level, player.base_health))
+        for text in (player.name, player.difficulty):
+            data = text.encode("utf-8")
+            self.file.write(STRING_LENGTH.pack(len(data)) + data)
+        self.file.flush()
+
+    def record(self, tick, event):
+        """
+        Append one key press. Each record is flushed, so a crash keeps the log.
+
+        Args:
+            tick (int): Update tick the key was handled on
+            event (pygame.event.Event): The KEYDOWN event
+        """
+        char = ord(event.unicode[0]) if event.unicode else 0
+        self.file.write(RECORD.pack(tick, event.key, char))
+        self.file.flush()
+
+    def close(self, tick, player):
+        """
+        Finish the log with the last tick and the player's final state.
+
+        Args:
+            tick (int): Update tick the session ended on
+            player (Player): The player at the end of the session
+        """
+        self.file.write(RECORD.pack(tick, END_KEY, 0) + FOOTER.pack(*get_final_state(player)))
+        self.file.close()
+
+
+def load_log(path):
+    """
+    Read an input log.
+
+    A log cut short by a crash has no end record; it replays up to its
+    last key press.
+
+    Args:
+        path (str): Log file
+
+    Returns:
+        SessionLog: The header, key records, end tick and final state (None if cut short)
+
+    Raises:
+        ValueError: If the file is not a valid input log
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < HEADER.size:
+        raise ValueError(f"{path} is too short to be an input log")
+    magic, version, seed, update_rate, typing_delay, level, health = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not an input log")
+    if version != VERSION:
+        raise ValueError(f"{path} has unsupported input log version {version}")
+
+    offset = HEADER.size
+    strings = []
+    for _ in range(2):
+        if offset + STRING_LENGTH.size > len(data):
+            raise ValueError(f"{path} has a truncated header")
+        (length,) = STRING_LENGTH.unpack_from(data, offset)
+        offset += STRING_LENGTH.size
+        strings.append(data[offset:offset + length].decode("utf-8"))
+        offset += length
+
+    records = []
+    end_tick = None
+    final_state = None
+    while offset + RECORD.size <= len(data):
+        tick, key, char = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if key == END_KEY:
+            end_tick = tick
+            if offset + FOOTER.size <= len(data):
+                final_state = FOOTER.unpack_from(data, offset)
+            break
+        records.append((tick, key, char))
+    if end_tick is None:
+        end_tick = records[-1][0] if records else 0
+    return SessionLog(seed, update_rate, typing_delay, strings[0], strings[1], level, health,
+                      records, end_tick, final_state)
+
+
+class LiveSession:
+    """Input from the player, optionally recorded to an input log."""
+
+    headless = False
+
+    def __init__(self, recorder=None):
+        """
+        Args:
+            recorder (InputRecorder or None): Where to record key presses
+        """
+        self.recorder = recorder
+
+    def create_scheduler(self):
+        """Get the frame scheduler for the session."""
+        return FrameScheduler()
+
+    def poll(self, tick):
+        """
+        Get the pending events, recording key presses as they are handled.
+
+        Escape is not recorded: the pause menu does not change the game.
+
+        Args:
+            tick (int): Current update tick
+
+        Yields:
+            pygame.event.Event: The pending events
+        """
+        for event in pygame.event.get():
+            if self.recorder and event.type == pygame.KEYDOWN and event.key != pygame.K_ESCAPE:
+                self.recorder.record(tick, event)
+            yield event
+
+    def close(self, tick, player):
+        """Finish the input log, if one is being recorded."""
+        if self.recorder:
+            self.recorder.close(tick, player)
+            print(f"Session recorded to {self.recorder.path}")
+
+
+class ReplaySession:
+    """Input read back from an input log."""
+
+    headless = True
+
+    def __init__(self, log):
+        """
+        Args:
+            log (SessionLog): The recorded session
+
+        Raises:
+            ValueError: If the log was recorded with different timing settings
+        """
+        if log.update_rate != UPDATE_RATE or log.typing_delay != TYPING_DELAY:
+            raise ValueError(f"Log was recorded at {log.update_rate} updates/s with a {log.typing_delay} ms "
+                             f"typing delay; this build uses {UPDATE_RATE} and {TYPING_DELAY}")
+        self.log = log
+        self.index = 0
+        self.end_tick = None
+        rng.seed(log.seed)
+
+    def create_scheduler(self):
+        """Get a scheduler that runs one update per frame, as fast as possible."""
+        return FrameScheduler(self.log.update_rate, realtime=False)
+
+    def poll(self, tick):
+        """
+        Get the recorded key presses due on a tick, then quit where the recording ended.
+
+        Args:
+            tick (int): Current update tick
+
+        Returns:
+            list: The events
+        """
+        pygame.event.pump()
+        events = []
+        records = self.log.records
+        while self.index < len(records) and records[self.index][0] <= tick:
+            _, key, char = records[self.index]
+            events.append(pygame.event.Event(pygame.KEYDOWN, key=key, unicode=chr(char) if char else "",
+                                             mod=0, scancode=0))
+            self.index += 1
+        if tick >= self.log.end_tick:
+            events.append(pygame.event.Event(pygame.QUIT))
+        return events
+
+    def close(self, tick, player):
+        """Remember where the replay ended."""
+        self.end_tick = tick
+
+
+def start_session(player, seed=SEED, record_dir=RECORD_DIR):
+    """
+    Seed the random streams for a new session and start recording it if enabled.
+
+    Args:
+        player (Player): The player starting the session
+        seed (int or None): Session seed; None picks a random one
+        record_dir (str or None): Directory for the input log; None records nothing
+
+    Returns:
+        LiveSession: The session
+    """
+    seed = rng.seed(seed)
+    recorder = None
+    if record_dir:
+        filename = f"session-{time.strftime('%Y%m%d-%H%M%S')}-{seed}{LOG_EXTENSION}"
+        recorder = InputRecorder(os.path.join(record_dir, filename), seed, player)
+    return LiveSession(recorder)
+
+
+def replay(path, size=REPLAY_SIZE):
+    """
+    Replay an input log headlessly.
+
+    Args:
+        path (str): Log file
+        size (tuple): Window size to render at
+
+    Returns:
+        dict: Result, ticks, final state, whether it matches the recording, and timings
+    """
+    log = load_log(path)
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+    width, height = size
+    screen = pygame.display.set_mode(size)
+    font = pygame.font.SysFont('Arial', 24)
+    small_font = pygame.font.SysFont('Arial', 18)
+
+    from .game import Player, game_loop
+    player = Player(log.name, log.difficulty, log.starting_level, log.starting_health)
+    session = ReplaySession(log)
+    start = time.perf_counter()
+    result = game_loop(screen, width, height, player, font, small_font, session=session)
+    elapsed = time.perf_counter() - start
+
+    final_state = get_final_state(player)
+    return {
+        "result": result,
+        "ticks": session.end_tick,
+        "final_state": final_state,
+        "matches": log.final_state is None or tuple(log.final_state) == final_state,
+        "complete": log.final_state is not None,
+        "seconds": elapsed,
+        "ticks_per_second": session.end_tick / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    """Replay input logs from the command line."""
+    parser = argparse.ArgumentParser(description="Replay recorded Escape the Castle sessions.")
+    parser.add_argument("logs", nargs="+", help="Input logs (.etcr)")
+    parser.add_argument("--size", type=parse_size, default=REPLAY_SIZE, help="WIDTHxHEIGHT to render at")
+    args = parser.parse_args()
+
+    mismatches = 0
+    for path in args.logs:
+        summary = replay(path, args.size)
+        level, health, max_health, spells = summary["final_state"]
+        status = "ok" if summary["matches"] else "MISMATCH"
+        if not summary["complete"]:
+            status += " (log cut short)"
+        print(f"{path}: {status} {summary['result']} after {summary['ticks']} ticks, "
+              f"level {level}, health {health}/{max_health}, spells {spells}, "
+              f"{summary['seconds']:.2f}s ({summary['ticks_per_second']:.0f} ticks/s)")
+        if not summary["matches"]:
+            mismatches += 1
+    sys.exit(1 if mismatches else 0)
+
+
+if __name__ == "__main__":
+    main()
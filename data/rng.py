@@ -0,0 +1,51 @@
+"""
+Seeded random number streams for Escape the Castle.
+
+Each subsystem draws from its own random.Random, all derived from one
+session seed. A subsystem that draws more or fewer numbers (the enemy
+shake draws on every rendered frame, so its count depends on the frame
+rate) then cannot change what another subsystem rolls, and a session can
+be reproduced from its seed and its inputs.
+"""
+
+import random
+
+STREAMS = ("levels", "events", "combat", "shake", "camera")
+SEED_BITS = 32
+
+
+class RandomStreams:
+    """
+    One random.Random per subsystem.
+
+    Attributes:
+        levels: Level variations and reminder messages
+        events: What lies behind a door or down a hallway
+        combat: Attack, spell, enemy strike and run rolls
+        shake: Enemy shake offsets, drawn per rendered frame (visual only)
+        camera: Screen shake offsets, drawn in fixed updates (visual only)
+    """
+
+    def __init__(self, seed=None):
+        self.seed(seed)
+
+    def seed(self, seed=None):
+        """
+        Reseed every stream from a session seed.
+
+        Args:
+            seed (int or None): Session seed; None picks a random one
+
+        Returns:
+            int: The session seed used
+        """
+        if seed is None:
+            seed = random.SystemRandom().getrandbits(SEED_BITS)
+        self.session_seed = seed
+        for name in STREAMS:
+            setattr(self, name, random.Random(f"{seed}:{name}"))
+        return seed
+
+
+# Shared streams for the game
+rng = RandomStreams()
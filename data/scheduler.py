@@ -0,0 +1,90 @@
+"""
+Fixed-timestep frame scheduler for Escape the Castle.
+"""
+
+import time
+import pygame
+from .config import UPDATE_RATE, MAX_CATCH_UP_STEPS, FPS_CAP
+
+
+class FrameScheduler:
+    """
+    Runs game updates at a fixed rate, whatever the frame rate.
+
+    Real time is banked each frame and spent in fixed update steps.
+    Timers use sim_time, which only moves by whole steps, so a slow
+    machine runs several updates in one frame and a fast one runs none in
+    some frames, but both play at the same speed. The unspent fraction of
+    a step is kept in alpha for blending animations between updates.
+
+    With realtime off, every frame runs exactly one update as fast as
+    possible, for replaying recorded sessions.
+    """
+
+    def __init__(self, update_rate=UPDATE_RATE, fps=FPS_CAP, max_steps=MAX_CATCH_UP_STEPS, realtime=True):
+        """
+        Args:
+            update_rate (int): Fixed updates per second
+            fps (int): Frame rate cap, 0 for uncapped
+            max_steps (int): Most updates run in one frame before time is dropped
+            realtime (bool): Whether updates follow the clock
+        """
+        self.step_ms = 1000.0 / update_rate
+        self.fps = fps
+        self.max_steps = max_steps
+        self.realtime = realtime
+        self.clock = pygame.time.Clock()
+        self.sim_time = 0.0
+        self.accumulator = 0.0
+        self.alpha = 0.0
+        self.last_time = time.perf_counter()
+        self.total_steps = 0
+        self.dropped_steps = 0
+
+    def reset(self):
+        """Forget the time spent away, e.g. while the pause menu was open."""
+        self.last_time = time.perf_counter()
+        self.accumulator = 0.0
+        self.alpha = 0.0
+
+    def updates(self):
+        """
+        Yield once for every fixed update due this frame.
+
+        Yields:
+            float: Simulation time in milliseconds after the step
+        """
+        if not self.realtime:
+            self.alpha = 1.0
+            self.sim_time += self.step_ms
+            self.total_steps += 1
+            yield self.sim_time
+            return
+        now = time.perf_counter()
+        self.accumulator += (now - self.last_time) * 1000
+        self.last_time = now
+        steps = int(self.accumulator // self.step_ms)
+        self.accumulator -= steps * self.step_ms
+        if steps > self.max_steps:
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+        for _ in range(steps):
+            self.sim_time += self.step_ms
+            self.total_steps += 1
+            yield self.sim_time
+        self.alpha = self.accumulator / self.step_ms
+
+    def end_frame(self):
+        """
+        Wait out the rest of the frame for the frame rate cap.
+
+        Call this after the frame is presented, so the wait does not delay it.
+        """
+        if self.fps > 0 and self.realtime:
+            self.clock.tick(self.fps)
+        else:
+            self.clock.tick()
+
+    def get_fps(self):
+        """Get the measured frame rate."""
+        return self.clock.get_fps()
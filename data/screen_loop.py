@@ -0,0 +1,190 @@
+"""
+Idle-aware event loop for the static screens of Escape the Castle.
+
+Menus and end screens only change when the player does something, so
+instead of redrawing at full speed they sleep in pygame.event.wait()
+until an event arrives or a timer they asked for is due, and redraw only
+then. While something is animating the loop runs at a capped frame rate
+instead. The CPU time spent on each screen is collected in screen_stats
+and printed at exit when ETC_PROFILE=1.
+"""
+
+import atexit
+import time
+import pygame
+from .config import DEFAULT_FPS, IDLE_WAIT_MS, PROFILE_ENABLED
+
+# Events that do not change a screen by themselves; screens with hover
+# effects decide for themselves whether a mouse move needs a redraw
+PASSIVE_EVENTS = (pygame.MOUSEMOTION,)
+
+# Scripted input (see set_input_script), used by the benchmarks
+input_script = None
+
+
+def set_input_script(script):
+    """
+    Feed every screen from a script instead of the event queue.
+
+    Args:
+        script (callable or None): Called with the screen name on every
+            poll, returns the events for that pass; None restores real input
+    """
+    global input_script
+    input_script = script
+
+
+class ScreenStats:
+    """CPU and wall time spent on each screen."""
+
+    def __init__(self):
+        self.screens = {}
+
+    def record(self, name, cpu_time, wall_time, frames, wakeups):
+        """
+        Add one visit to a screen.
+
+        Args:
+            name (str): Screen name
+            cpu_time (float): Process CPU seconds used while the screen was up
+            wall_time (float): Seconds the screen was up
+            frames (int): Frames presented
+            wakeups (int): Times the loop woke up
+        """
+        stats = self.screens.setdefault(name, {"visits": 0, "cpu_time": 0.0, "wall_time": 0.0,
+                                               "frames": 0, "wakeups": 0})
+        stats["visits"] += 1
+        stats["cpu_time"] += cpu_time
+        stats["wall_time"] += wall_time
+        stats["frames"] += frames
+        stats["wakeups"] += wakeups
+
+    def get_summary(self):
+        """
+        Get the totals for every screen.
+
+        Returns:
+            dict: Screen name -> visits, cpu_time, wall_time, cpu_percent, frames and wakeups
+        """
+        summary = {}
+        for name, stats in self.screens.items():
+            wall_time = stats["wall_time"]
+            summary[name] = dict(stats, cpu_percent=100 * stats["cpu_time"] / wall_time if wall_time else 0.0)
+        return summary
+
+    def report(self):
+        """Print the CPU time spent on each screen."""
+        if not self.screens:
+            return
+        print("screen        visits   cpu s  wall s  cpu %  frames")
+        for name, stats in self.get_summary().items():
+            print(f"{name:<12} {stats['visits']:7d} {stats['cpu_time']:7.2f} {stats['wall_time']:7.2f} "
+                  f"{stats['cpu_percent']:6.1f} {stats['frames']:7d}")
+
+
+class ScreenLoop:
+    """
+    Event loop for one visit to a screen.
+
+    Use it as a context manager around the screen's loop: poll() for
+    events, draw only when needs_redraw() is true, then present(). The
+    visit's CPU time is recorded when the block exits.
+    """
+
+    def __init__(self, name, fps=DEFAULT_FPS, idle_wait_ms=IDLE_WAIT_MS):
+        """
+        Args:
+            name (str): Screen name for the CPU time report
+            fps (int): Frame rate cap while animating
+            idle_wait_ms (int): Longest sleep while idle
+        """
+        self.name = name
+        self.fps = fps
+        self.idle_wait_ms = idle_wait_ms
+        self.clock = pygame.time.Clock()
+        self.redraw = True
+        self.wake_time = None
+        self.frames = 0
+        self.wakeups = 0
+        self.cpu_start = time.process_time()
+        self.wall_start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.close()
+        return False
+
+    def invalidate(self):
+        """Redraw the screen on the next pass."""
+        self.redraw = True
+
+    def wake_in(self, delay_ms):
+        """
+        Wake up after a delay even if no event arrives, e.g. for a blinking cursor.
+
+        Args:
+            delay_ms (int): Milliseconds from now
+        """
+        wake_time = pygame.time.get_ticks() + max(0, delay_ms)
+        if self.wake_time is None or wake_time < self.wake_time:
+            self.wake_time = wake_time
+
+    def poll(self, animating=False):
+        """
+        Wait for something to happen and get the events.
+
+        While animating, or with a redraw still pending, this waits for
+        the next frame at the capped frame rate. Otherwise it sleeps until
+        an event arrives or the next wake_in() timer is due. With an input
+        script set, it returns the script's events without waiting.
+
+        Args:
+            animating (bool): Whether the screen changes every frame
+
+        Returns:
+            list: The events that arrived
+        """
+        if input_script is not None:
+            # Scripted passes run as fast as possible
+            pygame.event.pump()
+            events = input_script(self.name)
+        elif animating or self.redraw:
+            self.clock.tick(self.fps)
+            events = pygame.event.get()
+        else:
+            timeout = self.idle_wait_ms
+            if self.wake_time is not None:
+                timeout = max(1, min(timeout, self.wake_time - pygame.time.get_ticks()))
+            event = pygame.event.wait(timeout)
+            events = [] if event.type == pygame.NOEVENT else [event]
+            events.extend(pygame.event.get())
+        self.wakeups += 1
+
+        if self.wake_time is not None and pygame.time.get_ticks() >= self.wake_time:
+            self.wake_time = None
+        if animating or any(event.type not in PASSIVE_EVENTS for event in events):
+            self.redraw = True
+        return events
+
+    def needs_redraw(self):
+        """Check whether the screen has to be drawn this pass."""
+        return self.redraw
+
+    def present(self):
+        """Show the drawn frame."""
+        pygame.display.flip()
+        self.redraw = False
+        self.frames += 1
+
+    def close(self):
+        """Record the visit in screen_stats."""
+        screen_stats.record(self.name, time.process_time() - self.cpu_start,
+                            time.perf_counter() - self.wall_start, self.frames, self.wakeups)
+
+
+# Shared CPU time report for every screen
+screen_stats = ScreenStats()
+if PROFILE_ENABLED:
+    atexit.register(screen_stats.report)
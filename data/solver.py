@@ -0,0 +1,550 @@
+"""
+Exact win-probability solver for Escape the Castle.
+
+A run is a Markov chain over (level, spells, health) for each difficulty.
+Every choice the player is offered comes from one of the randomlevel.json
+variations, halls draw an enemy from ENEMY_LIST and doors open a chest,
+so the chance of each next state can be worked out exactly. This module
+computes, for every state:
+
+    * the win probability under the best choice of path
+    * the expected number of choices until the run ends under that policy
+    * which offered path the best policy takes
+
+Run it with:
+
+    python -m data.solver --difficulty Hard
+
+Battles use the same rules as data.balance with run_attempt_chance 0:
+regular enemies are fought with normal attacks only, the player never
+runs and the Mad King gets every saved spell first.
+To keep the table finite, health is capped at HEALTH_CAP, spells at
+SPELL_CAP and levels at the starting level plus LEVEL_MARGIN. Stairs
+down from the deepest level stay on it instead of going further from the
+Mad King, which makes them slightly optimistic. The spell and level caps
+barely matter, but the health cap does: more health always helps against
+the Mad King, so the best policy keeps healing and most of its runs reach
+the cap, where any more health is thrown away. HEALTH_CAP is high enough
+that raising it moves the best win probability of every difficulty by
+less than CAP_TOLERANCE, which python -m data.solver --check-cap checks.
+The best policy's expected run length keeps growing with the cap, since
+it heals for as long as it can, so it only holds for this cap; the chance
+of reaching the cap is reported alongside it.
+python -m data.solver --check compares the answers for random wall picks
+with simulated runs of data.balance, and fails if they disagree.
+"""
+
+import argparse
+import itertools
+import math
+import sys
+import time
+import numpy as np
+from .constants import DIFFICULTIES
+from .enemies import ENEMY_LIST
+from .balance import (ACTIONS, STAIRS_DOWN, STAIRS_UP, DOOR, HALL, get_default_params,
+                      load_variation_actions, simulate)
+
+HEALTH_CAP = 900
+SPELL_CAP = 6
+LEVEL_MARGIN = 40
+TOLERANCE = 1e-10
+TURNS_TOLERANCE = 1e-6
+MAX_SWEEPS = 10000
+CHECK_RUNS = 200000
+CHECK_SIGMAS = 4.0  # Largest difference from a simulation, in standard errors, that counts as noise
+CAP_GROWTH = 1.5  # How much --check-cap raises the health cap by
+CAP_TOLERANCE = 1e-3  # Largest change in the win probability from raising the cap that counts as settled
+# Order used to break ties between equally good paths: prefer progress
+ACTION_PREFERENCE = (STAIRS_UP, DOOR, HALL, STAIRS_DOWN)
+PAIRS = tuple(itertools.combinations(range(len(ACTIONS)), 2))
+
+
+def uniform_pmf(low, high):
+    """Get the distribution of a uniform integer roll in [low, high]."""
+    pmf = np.zeros(high + 1)
+    pmf[low:] = 1.0 / (high - low + 1)
+    return pmf
+
+
+def add_capped(pmf, other, cap):
+    """
+    Get the distribution of the sum of two rolls, lumping totals above cap into cap.
+
+    Args:
+        pmf (numpy.ndarray): Distribution of the first roll
+        other (numpy.ndarray): Distribution of the second roll
+        cap (int): Largest total to keep separately
+
+    Returns:
+        numpy.ndarray: Distribution of the capped total
+    """
+    total = np.convolve(pmf, other)
+    if total.size > cap + 1:
+        total[cap] += total[cap + 1:].sum()
+        total = total[:cap + 1]
+    return total
+
+
+def get_kill_turns(enemy_health, attack_pmf, spell_pmf=None, spells=0):
+    """
+    Get the distribution of the number of hits needed to kill an enemy.
+
+    Args:
+        enemy_health (int): Enemy health
+        attack_pmf (numpy.ndarray): Damage distribution of a normal attack
+        spell_pmf (numpy.ndarray): Damage distribution of a spell
+        spells (int): Spells cast before attacking
+
+    Returns:
+        numpy.ndarray: Probability that the enemy dies on hit k + 1, indexed by k
+    """
+    dealt = np.ones(1)
+    killed = 0.0
+    turns = []
+    while dealt[:enemy_health].any():
+        hit = spell_pmf if len(turns) < spells else attack_pmf
+        dealt = add_capped(dealt, hit, enemy_health)
+        now_killed = dealt[enemy_health] if dealt.size > enemy_health else 0.0
+        turns.append(now_killed - killed)
+        killed = now_killed
+    return np.array(turns)
+
+
+def get_strike_totals(strike_pmf, count, cap=HEALTH_CAP):
+    """
+    Get the distributions of the total damage of 0..count - 1 enemy strikes.
+
+    Returns:
+        list: Capped damage distributions, one per number of strikes
+    """
+    totals = [np.ones(1)]
+    for _ in range(count - 1):
+        totals.append(add_capped(totals[-1], strike_pmf, cap))
+    return totals
+
+
+def get_battle_damage(enemy_health, enemy_attack, params, cap=HEALTH_CAP):
+    """
+    Get the distribution of the damage taken in a battle fought with normal attacks.
+
+    The enemy strikes back after every hit that does not kill it, so the
+    damage taken is the total of one strike fewer than the hits needed.
+
+    Returns:
+        numpy.ndarray: Damage distribution over 0..cap (cap means cap or more)
+    """
+    attack_pmf = uniform_pmf(params["min_attack_damage"], params["attack"])
+    strike_pmf = uniform_pmf(enemy_attack - params["attack_variance"],
+                             enemy_attack + params["attack_variance"])
+    turns = get_kill_turns(enemy_health, attack_pmf)
+    damage = np.zeros(cap + 1)
+    for chance, total in zip(turns, get_strike_totals(strike_pmf, len(turns), cap)):
+        damage[:total.size] += chance * total
+    return damage
+
+
+def get_boss_win_chances(params, spell_cap=SPELL_CAP, cap=HEALTH_CAP):
+    """
+    Get the chance of beating the Mad King from every health and spell count.
+
+    Returns:
+        numpy.ndarray: (spells, health) array of win probabilities
+    """
+    attack = params["attack"]
+    attack_pmf = uniform_pmf(params["min_attack_damage"], attack)
+    spell_pmf = uniform_pmf(attack + params["spell_bonus_min"], attack + params["spell_bonus_max"])
+    strike_pmf = uniform_pmf(params["boss_attack"] - params["attack_variance"],
+                             params["boss_attack"] + params["attack_variance"])
+    wins = np.zeros((spell_cap + 1, cap + 1))
+    for spells in range(spell_cap + 1):
+        turns = get_kill_turns(int(params["boss_health"]), attack_pmf, spell_pmf, spells)
+        for chance, total in zip(turns, get_strike_totals(strike_pmf, len(turns), cap)):
+            # Winning on hit k + 1 needs the k strikes before it to total less than the health
+            survived = np.zeros(cap + 1)
+            survived[:total.size] = total
+            wins[spells, 1:] += chance * np.cumsum(survived)[:-1]
+    return wins
+
+
+def get_choice_groups(actions):
+    """
+    Group the level variations by the set of paths they offer.
+
+    Args:
+        actions (numpy.ndarray): (variations, 3) array of action codes
+
+    Returns:
+        list: (offered action codes in preference order, probability) pairs
+    """
+    counts = {}
+    for row in actions:
+        offered = tuple(a for a in ACTION_PREFERENCE if a in row)
+        counts[offered] = counts.get(offered, 0) + 1
+    return [(offered, count / len(actions)) for offered, count in counts.items()]
+
+
+def get_ranking_code(ranking):
+    """
+    Encode a best-to-worst ranking of the paths as pairwise comparison bits.
+
+    Bit k is set when the first path of PAIRS[k] ranks above the second.
+
+    Args:
+        ranking (tuple): Path indices (in ACTION_PREFERENCE order), best first
+
+    Returns:
+        int: The ranking code
+    """
+    position = {path: i for i, path in enumerate(ranking)}
+    return sum(1 << bit for bit, (i, j) in enumerate(PAIRS) if position[i] < position[j])
+
+
+def get_ranking_weights(groups):
+    """
+    Get how often each path is taken for every ranking of the four paths.
+
+    When the paths are ranked best to worst, the player takes the best
+    ranked path on offer, so the chance of taking a path is the total
+    probability of the variations where nothing better is offered.
+
+    Args:
+        groups (list): Output of get_choice_groups()
+
+    Returns:
+        numpy.ndarray: (paths, ranking codes) weights, paths in ACTION_PREFERENCE order
+    """
+    weights = np.zeros((len(ACTIONS), 1 << len(PAIRS)))
+    for ranking in itertools.permutations(range(len(ACTIONS))):
+        code = get_ranking_code(ranking)
+        for offered, chance in groups:
+            taken = next(i for i in ranking if ACTION_PREFERENCE[i] in offered)
+            weights[taken, code] += chance
+    return weights
+
+
+class DungeonSolver:
+    """
+    Solves one difficulty exactly by value iteration.
+
+    Tables are indexed [level, spells, health]. Levels 1 and below are the
+    Mad King fight, and health 0 is a lost run. Sweeps go from the lowest
+    level upwards (Gauss-Seidel), so progress up the stairs is propagated
+    in a single sweep.
+    """
+
+    def __init__(self, difficulty, params=None, actions=None, max_level=None, health_cap=HEALTH_CAP):
+        """
+        Args:
+            difficulty (str): Difficulty name
+            params (dict): Overrides for balance.get_default_params(difficulty)
+            actions (numpy.ndarray): Level variation actions (loaded from randomlevel.json if None)
+            max_level (int): Deepest level in the table (defaults to starting level + LEVEL_MARGIN)
+            health_cap (int): Highest health in the table; more is kept as health_cap
+
+        Raises:
+            ValueError: If params make the player try to run; the solver does not model it
+        """
+        self.difficulty = difficulty
+        self.health_cap = health_cap
+        self.params = {**get_default_params(difficulty), **(params or {})}
+        if self.params["run_attempt_chance"]:
+            raise ValueError("The solver does not model running away; set run_attempt_chance to 0")
+        if actions is None:
+            actions = load_variation_actions()
+        self.ranking_weights = get_ranking_weights(get_choice_groups(actions))
+        # Chance of each path when one of the three walls is picked at random
+        counts = np.bincount(actions.ravel(), minlength=len(ACTIONS)) / actions.size
+        self.random_weights = counts[list(ACTION_PREFERENCE)][:, None, None]
+        self.max_level = max_level or int(self.params["starting_level"]) + LEVEL_MARGIN
+        self.hall_matrix = self._build_hall_matrix().T
+        self.pair_first = np.array([i for i, _ in PAIRS])
+        self.pair_second = np.array([j for _, j in PAIRS])
+        self.pair_bits = (1 << np.arange(len(PAIRS)))[:, None, None]
+        self.spell_index = np.minimum(np.arange(SPELL_CAP + 1) + 1, SPELL_CAP)
+        self.boss_wins = get_boss_win_chances(self.params, cap=health_cap)
+        self.optimal = True
+        self.win = None
+        self.turns = None
+        self.capped = None
+        self.rankings = None
+        self.sweeps = 0
+
+    def _build_hall_matrix(self):
+        """Health transition matrix of entering a hall: [health before, health after]."""
+        cap = self.health_cap
+        damage = np.zeros(cap + 1)
+        for enemy in ENEMY_LIST:
+            enemy_health = int(enemy["health"] * self.params["health_scale"])
+            damage += get_battle_damage(enemy_health, enemy["attack"], self.params, cap)
+        damage /= len(ENEMY_LIST)
+        matrix = np.zeros((cap + 1, cap + 1))
+        for health in range(1, cap + 1):
+            # Damage of health or more leaves the player dead (column 0, worth nothing)
+            matrix[health, 1:health + 1] = damage[health - 1::-1][:health]
+        return matrix
+
+    def _action_values(self, tables, level, terminal):
+        """
+        Get the value of taking each path at a level.
+
+        Args:
+            tables (numpy.ndarray): Current [table, level, spells, health] values
+            level (int): Level to evaluate
+            terminal (numpy.ndarray): [table, spells, health] values of reaching the Mad King
+
+        Returns:
+            numpy.ndarray: [path, table, spells, health] values, paths in ACTION_PREFERENCE order
+        """
+        here = tables[:, level]
+        min_heal, max_heal = self.params["min_heal"], self.params["max_heal"]
+        # Potions heal a uniform amount, so drinking one averages a window of higher
+        # health: take it as a difference of running totals
+        padded = np.concatenate((np.zeros(here.shape[:-1] + (1,)), here,
+                                 np.repeat(here[..., -1:], max_heal, axis=-1)), axis=-1)
+        totals = np.cumsum(padded, axis=-1)
+        healed = (totals[..., max_heal + 1:max_heal + self.health_cap + 2] -
+                  totals[..., min_heal:min_heal + self.health_cap + 1]) / (max_heal - min_heal + 1)
+        heal_chance = self.params["heal_chance"]
+        values = {
+            STAIRS_UP: terminal if level - 1 <= 1 else tables[:, level - 1],
+            STAIRS_DOWN: tables[:, min(level + 1, self.max_level)],
+            # A single 2-D product is much faster than numpy's stacked one
+            HALL: (here.reshape(-1, here.shape[-1]) @ self.hall_matrix).reshape(here.shape),
+            DOOR: heal_chance * healed + (1 - heal_chance) * here[:, self.spell_index],
+        }
+        return np.stack([values[a] for a in ACTION_PREFERENCE])
+
+    def _rank(self, values, level):
+        """Rank the paths for every state of a level and get the chance of taking each."""
+        # Ties go to the path earlier in ACTION_PREFERENCE
+        better = values[self.pair_first] >= values[self.pair_second]
+        code = (better * self.pair_bits).sum(axis=0)
+        self.rankings[level] = code
+        return self.ranking_weights[:, code]
+
+    def solve(self, optimal=True):
+        """
+        Solve for the win probabilities, policy and expected run lengths.
+
+        The expected number of choices and the chance of reaching the health
+        cap are evaluated alongside the win probabilities using the policy
+        of the current sweep, so all three settle together. The three tables
+        are swept as one array, so each hall costs a single matrix product.
+
+        Args:
+            optimal (bool): Take the best path; False picks one of the three walls
+                at random like the balance simulator
+
+        Returns:
+            DungeonSolver: self, for chaining
+        """
+        self.optimal = optimal
+        shape = (self.max_level + 1, SPELL_CAP + 1, self.health_cap + 1)
+        tables = np.zeros((3,) + shape)
+        self.win, self.turns, self.capped = tables
+        self.win[:2] = self.boss_wins
+        self.capped[:, :, -1] = 1.0
+        self.rankings = np.zeros(shape, dtype=np.uint8)
+        # Reaching the Mad King ends the run: no more choices, and reaching the cap counts
+        terminal = tables[:, 1].copy()
+        # Every choice counts once towards the expected run length
+        step = np.zeros((3, 1, 1))
+        step[1] = 1.0
+
+        for self.sweeps in range(1, MAX_SWEEPS + 1):
+            win_change = turns_change = 0.0
+            for level in range(2, self.max_level + 1):
+                values = self._action_values(tables, level, terminal)
+                weights = self._rank(values[:, 0], level) if optimal else self.random_weights
+                new = step + (values * weights[:, None]).sum(axis=0)
+                new[..., 0] = 0.0
+                new[2, :, -1] = 1.0
+                change = np.abs(new - tables[:, level]).max(axis=(1, 2))
+                win_change = max(win_change, float(change[0]), float(change[2]))
+                turns_change = max(turns_change, float(change[1]))
+                tables[:, level] = new
+            if win_change < TOLERANCE and turns_change < TURNS_TOLERANCE:
+                break
+        return self
+
+    def _index(self, level, health, spells):
+        """Clamp a state to the table."""
+        return (min(max(level, 0), self.max_level), min(spells, SPELL_CAP),
+                min(max(health, 0), self.health_cap))
+
+    def _state(self, level, health, spells):
+        """Fill in the starting state for missing values and clamp it to the table."""
+        level = self.params["starting_level"] if level is None else level
+        health = self.params["starting_health"] if health is None else health
+        spells = self.params["spells"] if spells is None else spells
+        return self._index(int(level), int(health), int(spells))
+
+    def win_probability(self, level=None, health=None, spells=None):
+        """
+        Get the chance of winning from a state (defaults to the starting state).
+
+        Returns:
+            float: Win probability
+        """
+        return float(self.win[self._state(level, health, spells)])
+
+    def expected_turns(self, level=None, health=None, spells=None):
+        """
+        Get the expected number of choices until the run ends from a state.
+
+        For the best policy this depends on the health cap when
+        capped_probability() is high; see the module docstring.
+
+        Returns:
+            float: Expected choices, counting the one that reaches the Mad King
+        """
+        index = self._state(level, health, spells)
+        return 0.0 if index[0] <= 1 else float(self.turns[index])
+
+    def capped_probability(self, level=None, health=None, spells=None):
+        """
+        Get the chance that a run from a state reaches the health cap (defaults to the starting state).
+
+        Health above the cap is thrown away, so the larger this is, the more
+        the answers depend on the cap.
+
+        Returns:
+            float: Probability of reaching health_cap before the run ends
+        """
+        return float(self.capped[self._state(level, health, spells)])
+
+    def best_choice(self, offered, level, health, spells):
+        """
+        Get the best of the offered paths for a state.
+
+        Args:
+            offered (list): Action names on offer (e.g. ["door", "hall", "stairs_up"])
+            level (int): Current level
+            health (int): Current health
+            spells (int): Spells held
+
+        Returns:
+            str: The action name to take
+        """
+        if not self.optimal:
+            raise ValueError("best_choice() needs a solver solved with optimal=True")
+        code = int(self.rankings[self._index(int(level), int(health), int(spells))])
+        wins = [0] * len(ACTIONS)
+        for bit, (i, j) in enumerate(PAIRS):
+            wins[i if code >> bit & 1 else j] += 1
+        for path in sorted(range(len(ACTIONS)), key=lambda i: -wins[i]):
+            if ACTIONS[ACTION_PREFERENCE[path]] in offered:
+                return ACTIONS[ACTION_PREFERENCE[path]]
+        raise ValueError(f"No known action in {offered}")
+
+
+def check_against_simulation(difficulty, runs=CHECK_RUNS, seed=None, actions=None):
+    """
+    Compare the solution for random wall picks with simulated runs.
+
+    Both play the same rules, so they differ only by sampling noise and
+    the solver's caps.
+
+    Args:
+        difficulty (str): Difficulty name
+        runs (int): Number of runs to simulate
+        seed (int): Seed for the simulation
+        actions (numpy.ndarray): Level variation actions (loaded from randomlevel.json if None)
+
+    Returns:
+        dict: Solved and simulated win rates and mean run lengths, and whether
+        both agree to within CHECK_SIGMAS standard errors
+    """
+    if actions is None:
+        actions = load_variation_actions()
+    solver = DungeonSolver(difficulty, actions=actions).solve(optimal=False)
+    result = simulate(difficulty, runs, seed, actions=actions)
+    win = solver.win_probability()
+    turns = solver.expected_turns()
+    # A single win is always within noise, however unlikely the solver says winning is
+    win_error = max(math.sqrt(win * (1 - win) / runs), 1 / runs)
+    turns_error = result["std_run_length"] / math.sqrt(runs)
+    agrees = (result["timeout_rate"] == 0
+              and abs(result["win_rate"] - win) <= CHECK_SIGMAS * win_error
+              and abs(result["mean_run_length"] - turns) <= CHECK_SIGMAS * turns_error)
+    return {"difficulty": difficulty, "win": win, "simulated_win": result["win_rate"],
+            "turns": turns, "simulated_turns": result["mean_run_length"], "agrees": agrees}
+
+
+def check_cap_sensitivity(difficulty, health_cap=HEALTH_CAP, actions=None):
+    """
+    Compare the best policy's win probability at a health cap and a higher one.
+
+    Args:
+        difficulty (str): Difficulty name
+        health_cap (int): Health cap to check
+        actions (numpy.ndarray): Level variation actions (loaded from randomlevel.json if None)
+
+    Returns:
+        dict: Win probabilities and expected run lengths at both caps, the chance
+        of reaching the cap, and whether the win probabilities agree to within
+        CAP_TOLERANCE
+    """
+    if actions is None:
+        actions = load_variation_actions()
+    solver = DungeonSolver(difficulty, actions=actions, health_cap=health_cap).solve()
+    higher = DungeonSolver(difficulty, actions=actions, health_cap=int(health_cap * CAP_GROWTH)).solve()
+    win = solver.win_probability()
+    higher_win = higher.win_probability()
+    return {"difficulty": difficulty, "win": win, "higher_cap_win": higher_win,
+            "turns": solver.expected_turns(), "higher_cap_turns": higher.expected_turns(),
+            "capped": solver.capped_probability(), "agrees": abs(higher_win - win) < CAP_TOLERANCE}
+
+
+def main():
+    """Solve every difficulty and print a summary."""
+    parser = argparse.ArgumentParser(description="Solve Escape the Castle runs exactly.")
+    parser.add_argument("--difficulty", choices=[name for name, _, _, _ in DIFFICULTIES])
+    parser.add_argument("--random", action="store_true",
+                        help="Evaluate random wall picks (as data.balance plays) instead of the best policy")
+    parser.add_argument("--check", action="store_true",
+                        help="Compare random wall picks with simulated runs and fail if they disagree")
+    parser.add_argument("--check-cap", action="store_true",
+                        help="Solve the best policy with a higher health cap and fail if the win probability moves")
+    parser.add_argument("--runs", type=int, default=CHECK_RUNS, help="Runs to simulate for --check")
+    parser.add_argument("--seed", type=int, default=None, help="Simulation seed for --check")
+    args = parser.parse_args()
+
+    difficulties = [args.difficulty] if args.difficulty else [name for name, _, _, _ in DIFFICULTIES]
+    actions = load_variation_actions()
+    if args.check:
+        print(f"{'difficulty':<10} {'win':>9} {'simulated':>9} {'turns':>8} {'simulated':>9}")
+        disagreements = 0
+        for difficulty in difficulties:
+            check = check_against_simulation(difficulty, args.runs, args.seed, actions)
+            print(f"{difficulty:<10} {check['win']:9.4%} {check['simulated_win']:9.4%} "
+                  f"{check['turns']:8.2f} {check['simulated_turns']:9.2f}"
+                  f"{'' if check['agrees'] else '  DISAGREE'}")
+            disagreements += not check["agrees"]
+        sys.exit(1 if disagreements else 0)
+
+    if args.check_cap:
+        higher_cap = int(HEALTH_CAP * CAP_GROWTH)
+        print(f"{'difficulty':<10} {'win':>9} {f'cap {higher_cap}':>9} {'turns':>8} "
+              f"{f'cap {higher_cap}':>9} {'at cap':>7}")
+        disagreements = 0
+        for difficulty in difficulties:
+            check = check_cap_sensitivity(difficulty, actions=actions)
+            print(f"{difficulty:<10} {check['win']:9.4%} {check['higher_cap_win']:9.4%} "
+                  f"{check['turns']:8.1f} {check['higher_cap_turns']:9.1f} {check['capped']:7.2%}"
+                  f"{'' if check['agrees'] else '  MOVED'}")
+            disagreements += not check["agrees"]
+        sys.exit(1 if disagreements else 0)
+
+    print(f"{'difficulty':<10} {'win':>9} {'turns':>8} {'at cap':>7} {'sweeps':>7} {'secs':>6}")
+    for difficulty in difficulties:
+        start = time.perf_counter()
+        solver = DungeonSolver(difficulty, actions=actions).solve(optimal=not args.random)
+        elapsed = time.perf_counter() - start
+        print(f"{difficulty:<10} {solver.win_probability():9.4%} {solver.expected_turns():8.1f} "
+              f"{solver.capped_probability():7.2%} {solver.sweeps:7d} {elapsed:6.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+"""
+Parallel balance parameter sweeps for Escape the Castle.
+
+Runs the balance simulator for every combination of a parameter grid and
+difficulty on a process pool, for example:
+
+    python -m data.sweep out/boss_sweep --runs 200000 --seed 7 \\
+        --param boss_health=100,150,200 --param heal_chance=0.5,0.7,0.9
+
+Every grid point gets its own seed spawned from --seed, so results do not
+depend on which worker ran them. Results are appended to a columnar store
+as they arrive: one little-endian binary file per column plus schema.json
+in the output directory. Read it back with load_sweep().
+"""
+
+import argparse
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from .constants import DIFFICULTIES
+from .balance import DEFAULT_MAX_STEPS, simulate, get_default_params, load_variation_actions
+
+METRICS = ("win_rate", "death_rate", "timeout_rate", "mean_run_length",
+           "median_run_length", "p95_run_length")
+SCHEMA_FILE = "schema.json"
+
+
+def expand_grid(grid):
+    """
+    Expand a parameter grid into every combination.
+
+    Args:
+        grid (dict): Parameter name -> list of values
+
+    Returns:
+        list: One dict of parameter values per combination
+    """
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def run_task(task):
+    """
+    Simulate one grid point. Runs in a worker process.
+
+    Args:
+        task (tuple): (task index, difficulty, params, runs, seed, max_steps)
+
+    Returns:
+        tuple: (task index, difficulty, params, metrics dict)
+    """
+    index, difficulty, params, runs, seed, max_steps = task
+    result = simulate(difficulty, runs, seed, params=params, max_steps=max_steps,
+                      actions=load_variation_actions())
+    return index, difficulty, params, {name: result[name] for name in METRICS}
+
+
+class ColumnWriter:
+    """Appends rows to a directory of per-column binary files."""
+
+    def __init__(self, directory, columns):
+        """
+        Args:
+            directory (str): Output directory (created if needed)
+            columns (list): (name, numpy dtype string) pairs
+        """
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.columns = columns
+        with open(os.path.join(directory, SCHEMA_FILE), "w") as f:
+            json.dump({"columns": columns}, f, indent=2)
+        self.files = {name: open(os.path.join(directory, f"{name}.bin"), "wb")
+                      for name, _ in columns}
+        self.rows = 0
+
+    def append(self, row):
+        """
+        Write one row and flush it to disk.
+
+        Args:
+            row (dict): Column name -> value
+        """
+        for name, dtype in self.columns:
+            handle = self.files[name]
+            handle.write(np.array([row[name]], dtype=dtype).tobytes())
+            handle.flush()
+        self.rows += 1
+
+    def close(self):
+        """Close every column file."""
+        for handle in self.files.values():
+            handle.close()
+
+
+def load_sweep(directory):
+    """
+    Load a sweep written by ColumnWriter.
+
+    Args:
+        directory (str): Sweep output directory
+
+    Returns:
+        dict: Column name -> numpy array
+    """
+    with open(os.path.join(directory, SCHEMA_FILE), "r") as f:
+        columns = json.load(f)["columns"]
+    return {name: np.fromfile(os.path.join(directory, f"{name}.bin"), dtype=dtype)
+            for name, dtype in columns}
+
+
+def run_sweep(output_dir, grid, difficulties, runs, seed=None, max_steps=DEFAULT_MAX_STEPS, workers=None):
+    """
+    Simulate every grid point for every difficulty on a process pool.
+
+    Args:
+        output_dir (str): Directory for the columnar results
+        grid (dict): Parameter name -> list of values
+        difficulties (list): Difficulty names
+        runs (int): Runs per grid point
+        seed (int): Root seed; each grid point gets its own child seed
+        max_steps (int): Step limit per run
+        workers (int): Worker processes (defaults to the CPU count)
+
+    Returns:
+        int: Number of rows written
+    """
+    unknown = set(grid) - set(get_default_params(difficulties[0]))
+    if unknown:
+        raise ValueError(f"Unknown balance parameters: {', '.join(sorted(unknown))}")
+
+    points = [(difficulty, params) for difficulty in difficulties for params in expand_grid(grid)]
+    seeds = np.random.SeedSequence(seed).spawn(len(points))
+    tasks = [(i, difficulty, params, runs, child, max_steps)
+             for i, ((difficulty, params), child) in enumerate(zip(points, seeds))]
+
+    difficulty_names = [name for name, _, _, _ in DIFFICULTIES]
+    columns = ([("task", "<i8"), ("difficulty", "<i8")] +
+               [(name, "<f8") for name in sorted(grid)] +
+               [(name, "<f8") for name in METRICS])
+    writer = ColumnWriter(output_dir, columns)
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run_task, task) for task in tasks]
+            for future in as_completed(futures):
+                index, difficulty, params, metrics = future.result()
+                writer.append({"task": index, "difficulty": difficulty_names.index(difficulty),
+                               **params, **metrics})
+                print(f"[{writer.rows}/{len(tasks)}] {difficulty} {params} "
+                      f"win={metrics['win_rate']:.2%}")
+    finally:
+        writer.close()
+    return writer.rows
+
+
+def parse_value(text):
+    """Parse a parameter value, keeping whole numbers as ints."""
+    value = float(text)
+    return int(value) if value.is_integer() and "." not in text else value
+
+
+def parse_param(text):
+    """Parse a name=v1,v2,... argument into (name, [values])."""
+    name, values = text.split("=", 1)
+    return name.strip(), [parse_value(value) for value in values.split(",")]
+
+
+def main():
+    """Run a sweep from the command line."""
+    parser = argparse.ArgumentParser(description="Sweep Escape the Castle balance parameters.")
+    parser.add_argument("output", help="Directory for the columnar results")
+    parser.add_argument("--param", action="append", default=[], type=parse_param,
+                        help="name=v1,v2,... (repeatable)")
+    parser.add_argument("--difficulty", action="append",
+                        choices=[name for name, _, _, _ in DIFFICULTIES])
+    parser.add_argument("--runs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--max-steps", type=int, default=DEFAULT_MAX_STEPS)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    grid = dict(args.param)
+    difficulties = args.difficulty or [name for name, _, _, _ in DIFFICULTIES]
+    start = time.perf_counter()
+    rows = run_sweep(args.output, grid, difficulties, args.runs, args.seed,
+                     args.max_steps, args.workers)
+    print(f"Wrote {rows} rows to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
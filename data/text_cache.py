@@ -0,0 +1,172 @@
+"""
+Word wrapping and the text layout and render cache for Escape the Castle.
+"""
+
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 512
+WORD_WIDTH_CACHE_SIZE = 4096
+
+# (font, word) -> rendered width in pixels, for wrap_text()
+_word_widths = {}
+
+
+def get_word_width(font, word):
+    """
+    Get the rendered width of a word, measuring it only the first time.
+
+    Args:
+        font (pygame.font.Font): Font to measure with
+        word (str): The word
+
+    Returns:
+        int: Width in pixels
+    """
+    key = (font, word)
+    width = _word_widths.get(key)
+    if width is None:
+        if len(_word_widths) >= WORD_WIDTH_CACHE_SIZE:
+            _word_widths.clear()
+        width = _word_widths[key] = font.size(word)[0]
+    return width
+
+
+def wrap_text(text, width, font):
+    """
+    Wrap text to fit within a specified width.
+
+    Each line holds as many words as fit, with a trailing space, strictly
+    inside the width, and always at least one word. Cached word widths
+    give a first guess at where a line ends; a few exact measurements
+    around the guess (galloping, then binary search) settle it, instead
+    of measuring the line again after every word.
+    
+    Args:
+        text (str): Text to wrap
+        width (int): Maximum width in pixels
+        font (pygame.font.Font): Font to use for measuring
+        
+    Returns:
+        list: List of wrapped lines
+    """
+    words = text.split(' ')
+    space_width = get_word_width(font, " ")
+    wrapped_lines = []
+    start = 0
+
+    def fits(count):
+        return font.size(" ".join(words[start:start + count]) + " ")[0] < width
+
+    while start < len(words):
+        remaining = len(words) - start
+
+        # Guess from the cached widths, ignoring kerning between words
+        guess = 0
+        used = 0
+        while guess < remaining:
+            used += get_word_width(font, words[start + guess]) + space_width
+            if used >= width:
+                break
+            guess += 1
+        guess = max(1, guess)
+
+        # Find the longest run of words that fits; the first word always goes in
+        if guess == 1 or fits(guess):
+            low, high = guess, remaining
+            step = 1
+            while low + step <= high and fits(low + step):
+                low += step
+                step *= 2
+            high = min(high, low + step - 1)
+        else:
+            low, high = 1, guess - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            if fits(middle):
+                low = middle
+            else:
+                high = middle - 1
+
+        wrapped_lines.append(" ".join(words[start:start + low]).strip())
+        start += low
+
+    return wrapped_lines
+
+
+
+
+class TextCache:
+    """
+    LRU cache of wrapped and rendered text.
+
+    Entries are keyed by (font, text, width, color) and hold the rendered
+    surface of every wrapped line, so unchanged log lines cost a dictionary
+    lookup instead of a wrap_text() call and a font render per frame.
+    """
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def layout(self, font, text, width, color, cache=True):
+        """
+        Get the rendered lines of a text wrapped to a width.
+
+        Args:
+            font (pygame.font.Font): Font to render with
+            text (str): Text to wrap and render
+            width (int or None): Maximum line width in pixels, None for no wrapping
+            color (tuple): Text color
+            cache (bool): Whether to keep the result; text that changes every
+                frame (such as a line being typed) would only push out useful entries
+
+        Returns:
+            list: Rendered pygame.Surface for each wrapped line
+        """
+        key = (font, text, width, color)
+        surfaces = self.entries.get(key)
+        if surfaces is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return surfaces
+
+        self.misses += 1
+        lines = [text] if width is None else wrap_text(text, width, font)
+        surfaces = [font.render(line, True, color) for line in lines]
+        if not cache:
+            return surfaces
+        self.entries[key] = surfaces
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        return surfaces
+
+    def render(self, font, text, color):
+        """
+        Get a single rendered line of text.
+
+        Args:
+            font (pygame.font.Font): Font to render with
+            text (str): Text to render
+            color (tuple): Text color
+
+        Returns:
+            pygame.Surface: The rendered text
+        """
+        return self.layout(font, text, None, color)[0]
+
+    def clear(self):
+        """Drop every cached entry."""
+        self.entries.clear()
+
+    def get_stats(self):
+        """Get the cache counters."""
+        return {"hits": self.hits, "misses": self.misses,
+                "evictions": self.evictions, "size": len(self.entries)}
+
+
+# Shared cache for all game text
+text_cache = TextCache()
@@ -0,0 +1,117 @@
+"""
+Typewriter text effect for Escape the Castle.
+"""
+
+from .constants import TYPING_DELAY
+
+LINE_BREAK_CHARS = 2  # A line break takes as long to type as two characters
+
+
+class Typewriter:
+    """
+    Reveals lines of text one character at a time.
+
+    Line lengths are measured once, when a line is first seen, and the
+    cursor remembers which line it is in, so an update only touches the
+    characters revealed since the previous one. The cursor moves by
+    elapsed time rather than by frames: after a slow frame it catches up
+    on every character it should have typed in the meantime.
+    """
+
+    def __init__(self, delay=TYPING_DELAY):
+        """
+        Args:
+            delay (int): Milliseconds per character; 0 or less reveals text at once
+        """
+        self.delay = delay
+        self.lines = []
+        self.visible = []
+        self.measured = 0
+        self.total_chars = 0
+        self.cursor = 0
+        self.line = 0
+        self.line_start = 0
+        self.last_time = 0
+        self.typing = False
+
+    def start(self, lines, now):
+        """
+        Start typing a list of lines from the beginning.
+
+        The list is kept by reference, so lines appended to it while typing
+        are typed as well.
+
+        Args:
+            lines (list): Lines of text to type
+            now (float): Current time in milliseconds
+        """
+        self.lines = lines
+        self.visible = []
+        self.measured = 0
+        self.total_chars = 0
+        self.cursor = 0
+        self.line = 0
+        self.line_start = 0
+        self.last_time = now
+        self.typing = True
+        self._measure()
+
+    def stop(self):
+        """Stop typing, leaving the text typed so far visible."""
+        self.typing = False
+
+    def _measure(self):
+        """Add the lengths of lines that have not been measured yet."""
+        for line in self.lines[self.measured:]:
+            if self.measured:
+                self.total_chars += LINE_BREAK_CHARS
+            self.total_chars += len(line)
+            self.measured += 1
+
+    def update(self, now):
+        """
+        Advance the cursor by the time elapsed since the last character.
+
+        Args:
+            now (float): Current time in milliseconds
+        """
+        if not self.typing:
+            return
+        self._measure()
+        if self.delay <= 0:
+            steps = self.total_chars - self.cursor
+        else:
+            steps = int((now - self.last_time) // self.delay)
+            self.last_time += steps * self.delay
+        if steps > 0:
+            self.cursor = min(self.cursor + steps, self.total_chars)
+            self._reveal()
+        if self.cursor >= self.total_chars:
+            self.typing = False
+
+    def _reveal(self):
+        """Bring the visible lines up to the cursor, starting at the current line."""
+        while self.line < self.measured:
+            line = self.lines[self.line]
+            shown = self.cursor - self.line_start
+            if shown >= len(line):
+                text = line
+            elif shown > 0:
+                text = line[:shown]
+            else:
+                break
+            if self.line < len(self.visible):
+                self.visible[self.line] = text
+            else:
+                self.visible.append(text)
+            if shown < len(line):
+                break
+            self.line_start += len(line) + LINE_BREAK_CHARS
+            self.line += 1
+
+    @property
+    def partial_line(self):
+        """Index of the visible line that is still being typed, or None."""
+        if self.line < len(self.visible):
+            return self.line
+        return None
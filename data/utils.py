@@ -5,6 +5,8 @@ Utility functions for Escape the Castle game.
 import pygame
 import os
 from .constants import *
+# The word-wrapping helpers live with the text cache, which uses them
+from .text_cache import text_cache, get_word_width, wrap_text
 
 
 def load_font(font_path, size, fallback_font='Arial'):
@@ -53,37 +55,6 @@ def load_image(image_path, target_size=None, convert_alpha=False):
         return None
 
 
-def wrap_text(text, width, font):
-    """
-    Wrap text to fit within a specified width.
-    
-    Args:
-        text (str): Text to wrap
-        width (int): Maximum width in pixels
-        font (pygame.font.Font): Font to use for measuring
-        
-    Returns:
-        list: List of wrapped lines
-    """
-    words = text.split(' ')
-    wrapped_lines = []
-    current_line = ""
-    
-    for word in words:
-        test_line = current_line + word + " "
-        if font.size(test_line)[0] < width:
-            current_line = test_line
-        else:
-            if current_line:
-                wrapped_lines.append(current_line.strip())
-            current_line = word + " "
-    
-    if current_line:
-        wrapped_lines.append(current_line.strip())
-        
-    return wrapped_lines
-
-
 def get_health_bar_color(health_percent):
     """
     Get the color for a health bar based on health percentage.
@@ -104,6 +75,36 @@ def get_health_bar_color(health_percent):
         return RED
 
 
+HEALTH_BAR_CACHE_SIZE = 256
+
+# (width, height, fill width, color) -> drawn bar, for draw_health_bar()
+_health_bars = {}
+
+
+def get_health_bar_surface(width, height, fill_width, color):
+    """
+    Get a health bar drawn on a transparent surface, drawing it only the first time.
+
+    Args:
+        width (int): Width of the bar
+        height (int): Height of the bar
+        fill_width (float): Width of the filled part
+        color (tuple): Fill color
+
+    Returns:
+        pygame.Surface: The bar, with transparent rounded corners
+    """
+    key = (width, height, int(fill_width), color)
+    surface = _health_bars.get(key)
+    if surface is None:
+        if len(_health_bars) >= HEALTH_BAR_CACHE_SIZE:
+            _health_bars.clear()
+        surface = _health_bars[key] = pygame.Surface((width, height), pygame.SRCALPHA)
+        pygame.draw.rect(surface, BLACK, pygame.Rect(0, 0, width, height), border_radius=5)
+        pygame.draw.rect(surface, color, pygame.Rect(0, 0, fill_width, height), border_radius=5)
+    return surface
+
+
 def draw_health_bar(screen, x, y, width, height, current_health, max_health, font):
     """
     Draw a health bar with text.
@@ -121,17 +122,11 @@ def draw_health_bar(screen, x, y, width, height, current_health, max_health, fon
     health_percent = current_health / max_health if max_health > 0 else 0
     color = get_health_bar_color(health_percent)
     
-    # Background
-    bg_rect = pygame.Rect(x, y, width, height)
-    pygame.draw.rect(screen, BLACK, bg_rect, border_radius=5)
-    
-    # Fill
-    fill_rect = pygame.Rect(x, y, width * health_percent, height)
-    pygame.draw.rect(screen, color, fill_rect, border_radius=5)
+    # Background and fill, drawn once per fill width
+    screen.blit(get_health_bar_surface(width, height, width * health_percent, color), (x, y))
     
-    # Text
-    health_text = f"HP: {current_health}/{max_health}"
-    text_surface = font.render(health_text, True, WHITE)
+    # Text, rendered once per health value
+    text_surface = text_cache.render(font, f"HP: {current_health}/{max_health}", WHITE)
     screen.blit(text_surface, (x + width + 10, y))
 
 
@@ -153,3 +148,17 @@ def clamp(value, min_val, max_val):
         Clamped value
     """
     return max(min_val, min(value, max_val))
+
+
+def parse_size(text):
+    """
+    Parse a WIDTHxHEIGHT string.
+
+    Args:
+        text (str): Size such as "1280x720"
+
+    Returns:
+        tuple: (width, height)
+    """
+    width, height = text.lower().split("x")
+    return int(width), int(height)
@@ -3,7 +3,9 @@ import pygame
 import os
 import sys
 from .constants import *
-from .utils import load_font, load_image, get_script_dir
+from .utils import get_script_dir
+from .assets import assets
+from .screen_loop import ScreenLoop
 
 def show_win_screen(screen, width, height, player):
     """Displays the victory screen after defeating the Mad King."""
@@ -12,13 +14,13 @@ def show_win_screen(screen, width, height, player):
     
     # Background image for victory
     bg_path = os.path.join(script_dir, "images", "game", "victory.jpeg")
-    background = load_image(bg_path, (width, height))
+    background = assets.image(bg_path, (width, height))
 
     # Custom gothic font
     font_path = os.path.join(script_dir, "fonts", "Blkchcry.TTF")
-    title_font = load_font(font_path, 72, "georgia")
-    option_font = load_font(font_path, 40, "georgia")
-    stats_font = load_font(font_path, 32, "georgia")
+    title_font = assets.font(font_path, 72, "georgia")
+    option_font = assets.font(font_path, 40, "georgia")
+    stats_font = assets.font(font_path, 32, "georgia")
 
     buttons = [
         {"text": "Play Again", "action": "replay"},
@@ -38,52 +40,58 @@ def show_win_screen(screen, width, height, player):
                            btn_width, btn_height)
         button_rects.append(rect)
 
-    clock = pygame.time.Clock()
-
-    while True:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
-                for rect, btn in zip(button_rects, buttons):
-                    if rect.collidepoint(event.pos):
-                        return btn["action"]
-
-        # Draw background
-        if background:
-            screen.blit(background, (0, 0))
-        else:
-            screen.fill(DARK_GRAY)
-
-        # Title
-        title_surface = title_font.render("Victory!", True, GOLD)
-        screen.blit(title_surface, title_surface.get_rect(center=(width//2, height//5)))
-
-        sub_surface = option_font.render("You defeated the Mad King Baramour!", True, WHITE)
-        screen.blit(sub_surface, sub_surface.get_rect(center=(width//2, height//5 + 80)))
-
-        # Stats (example: name, remaining health, etc.)
-        stats = [
-            f"Hero: {player.name}",
-            f"Remaining Health: {player.health}",
-            f"Potions Collected: {getattr(player, 'potions', 0)}",
-            f"Spells Cast: {getattr(player, 'spells_cast', 0)}",
-        ]
-        for i, line in enumerate(stats):
-            stat_text = stats_font.render(line, True, GOLD)
-            screen.blit(stat_text, stat_text.get_rect(center=(width//2, height//2 - 60 + i*40)))
-
-        # Buttons
-        mouse_pos = pygame.mouse.get_pos()
-        for rect, btn in zip(button_rects, buttons):
-            color = GOLD if rect.collidepoint(mouse_pos) else WHITE
-            pygame.draw.rect(screen, DARK_GRAY, rect, border_radius=12)
-            pygame.draw.rect(screen, color, rect, 3, border_radius=12)
-
-            text_surface = option_font.render(btn["text"], True, color)
-            screen.blit(text_surface, text_surface.get_rect(center=rect.center))
-
-        pygame.display.flip()
-        clock.tick(60)
-
+    # Redraw only on input or when the highlighted button changes
+    hovered = None
+    with ScreenLoop("victory") as loop:
+        while True:
+            for event in loop.poll():
+                if event.type == pygame.QUIT:
+                    pygame.quit()
+                    sys.exit()
+                elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                    for rect, btn in zip(button_rects, buttons):
+                        if rect.collidepoint(event.pos):
+                            return btn["action"]
+
+            mouse_pos = pygame.mouse.get_pos()
+            now_hovered = next((i for i, rect in enumerate(button_rects) if rect.collidepoint(mouse_pos)), None)
+            if now_hovered != hovered:
+                hovered = now_hovered
+                loop.invalidate()
+            if not loop.needs_redraw():
+                continue
+
+            # Draw background
+            if background:
+                screen.blit(background, (0, 0))
+            else:
+                screen.fill(DARK_GRAY)
+
+            # Title
+            title_surface = title_font.render("Victory!", True, GOLD)
+            screen.blit(title_surface, title_surface.get_rect(center=(width//2, height//5)))
+
+            sub_surface = option_font.render("You defeated the Mad King Baramour!", True, WHITE)
+            screen.blit(sub_surface, sub_surface.get_rect(center=(width//2, height//5 + 80)))
+
+            # Stats (example: name, remaining health, etc.)
+            stats = [
+                f"Hero: {player.name}",
+                f"Remaining Health: {player.health}",
+                f"Potions Collected: {getattr(player, 'potions', 0)}",
+                f"Spells Cast: {getattr(player, 'spells_cast', 0)}",
+            ]
+            for i, line in enumerate(stats):
+                stat_text = stats_font.render(line, True, GOLD)
+                screen.blit(stat_text, stat_text.get_rect(center=(width//2, height//2 - 60 + i*40)))
+
+            # Buttons
+            for i, (rect, btn) in enumerate(zip(button_rects, buttons)):
+                color = GOLD if i == hovered else WHITE
+                pygame.draw.rect(screen, DARK_GRAY, rect, border_radius=12)
+                pygame.draw.rect(screen, color, rect, 3, border_radius=12)
+
+                text_surface = option_font.render(btn["text"], True, color)
+                screen.blit(text_surface, text_surface.get_rect(center=rect.center))
+
+            loop.present()
@@ -6,12 +6,14 @@ import data.welcome as welcome
 import data.game as game
 import data.ingamemenu as ingamemenu
 from data.constants import STARTING_HEALTH
+from data.display import create_screen
 
 # --- Pygame Initialization ---
 pygame.init()
 
 # --- Screen Dimensions and Colors ---
-SCREEN = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+# Native resolution, or the logical one set with ETC_RENDER_SIZE
+SCREEN = create_screen()
 WIDTH, HEIGHT = SCREEN.get_size()
 pygame.display.set_caption("Escape the Castle")
 FONT = pygame.font.SysFont('Arial', 24)